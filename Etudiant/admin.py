@@ -7,3 +7,5 @@ admin.site.register(Note)
 admin.site.register(Matiere)
 admin.site.register(Etudiant)
 admin.site.register(Bulletin)
+admin.site.register(BulletinJob)
+admin.site.register(CompteStats)
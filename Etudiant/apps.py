@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class EtudiantConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Etudiant'
+
+    def ready(self):
+        from . import connexion_sqlite, signals  # noqa: F401
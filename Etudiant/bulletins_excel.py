@@ -0,0 +1,154 @@
+# bulletins_excel.py
+# Export Excel des bulletins d'une classe avec un classeur openpyxl en écriture seule :
+# les lignes sont écrites sur disque au fur et à mesure, la mémoire ne dépend pas
+# du nombre de notes.
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+_bordure = Side(style='thin')
+
+# Styles nommés, enregistrés une fois dans le classeur et partagés par toutes les cellules
+STYLES = [
+    NamedStyle(name='bulletin_titre', font=Font(bold=True, size=14, color="1F4E79")),
+    NamedStyle(
+        name='bulletin_entete',
+        font=Font(bold=True, color="FFFFFF"),
+        fill=PatternFill(start_color="366092", end_color="366092", fill_type="solid"),
+        alignment=Alignment(horizontal='center', vertical='center'),
+        border=Border(left=_bordure, right=_bordure, top=_bordure, bottom=_bordure),
+    ),
+    NamedStyle(
+        name='bulletin_cellule',
+        border=Border(left=_bordure, right=_bordure, top=_bordure, bottom=_bordure),
+    ),
+    NamedStyle(name='bulletin_gras', font=Font(bold=True)),
+]
+
+LARGEURS_RECAP = [5, 15, 15, 15, 12, 8, 12, 10]
+LARGEURS_DETAIL = [20, 15, 20, 8, 10, 10, 15, 12, 10]
+LARGEURS_ETUDIANT = [20, 8, 10, 10, 15, 12, 10]
+
+ENTETES_RECAP = ['N°', 'Nom', 'Prénom', 'Numéro Étudiant', 'Moyenne Générale', 'Rang', 'Mention', 'Nb Notes']
+ENTETES_DETAIL = ['Étudiant', 'N° Étudiant', 'Matière', 'Code', 'Note', 'Note/20', 'Type', 'Date', 'Coefficient']
+ENTETES_NOTES = ['Matière', 'Code', 'Note', 'Note/20', 'Type', 'Date', 'Coefficient']
+
+
+class _Feuille:
+    """Feuille en écriture seule : les lignes sont ajoutées dans l'ordre et ne sont plus modifiables"""
+
+    def __init__(self, classeur, titre, largeurs):
+        self.ws = classeur.create_sheet(titre)
+        # Les largeurs doivent être fixées avant la première ligne
+        for colonne, largeur in enumerate(largeurs, 1):
+            self.ws.column_dimensions[get_column_letter(colonne)].width = largeur
+
+    def ligne(self, valeurs=(), style=None):
+        if style is None:
+            self.ws.append(list(valeurs))
+            return
+        cellules = []
+        for valeur in valeurs:
+            cellule = WriteOnlyCell(self.ws, value=valeur)
+            cellule.style = style
+            cellules.append(cellule)
+        self.ws.append(cellules)
+
+    def libelle(self, libelle, valeur):
+        cellule = WriteOnlyCell(self.ws, value=libelle)
+        cellule.style = 'bulletin_gras'
+        self.ws.append([cellule, valeur])
+
+
+def _ligne_note(note):
+    return [
+        note['matiere_nom'],
+        note['matiere_code'],
+        f"{note['note']}/{note['note_sur']}",
+        round(note['note_sur_vingt'], 2),
+        note['type_libelle'],
+        note['date_evaluation'].strftime('%d/%m/%Y'),
+        note['coefficient'],
+    ]
+
+
+def ecrire_bulletins_excel(matrice, annee_scolaire, fichier, progression=None):
+    """Écrit dans `fichier` le classeur des bulletins d'une classe (MatriceNotesClasse).
+
+    Onglets : récapitulatif trié par rang, notes détaillées, puis un onglet par étudiant.
+    """
+    classe = matrice.classe
+    semestre = matrice.semestre
+    etudiants = matrice.etudiants
+    classement = matrice.classement
+    sous_titre = f"Semestre: {semestre} - Année: {annee_scolaire}"
+
+    classeur = Workbook(write_only=True)
+    for style in STYLES:
+        classeur.add_named_style(style)
+
+    # 1. Onglet récapitulatif
+    recap = _Feuille(classeur, "Récapitulatif", LARGEURS_RECAP)
+    recap.ligne([f"RÉCAPITULATIF - {classe.nom}"], 'bulletin_titre')
+    recap.ligne([sous_titre])
+    recap.ligne()
+    recap.ligne(ENTETES_RECAP, 'bulletin_entete')
+
+    for i, position in enumerate(classement.ordre(), 1):
+        etudiant = etudiants[position]
+        resultat = classement.resultat(etudiant.id)
+        moyenne = resultat['moyenne']
+        recap.ligne([
+            i,
+            etudiant.nom,
+            etudiant.prenom,
+            etudiant.numero_etudiant,
+            moyenne if moyenne is not None else '-',
+            resultat['rang'] or '-',
+            resultat['mention'] or '-',
+            int(matrice.nb_notes[etudiant.id]),
+        ], 'bulletin_cellule')
+
+    # 2. Onglet détaillé par matière
+    detail = _Feuille(classeur, "Notes par Matière", LARGEURS_DETAIL)
+    detail.ligne([f"NOTES DÉTAILLÉES - {classe.nom}"], 'bulletin_titre')
+    detail.ligne([sous_titre])
+    detail.ligne()
+    detail.ligne(ENTETES_DETAIL, 'bulletin_entete')
+
+    for etudiant in etudiants:
+        for note in matrice.notes_etudiant(etudiant.id):
+            detail.ligne([etudiant.nom_complet, etudiant.numero_etudiant] + _ligne_note(note), 'bulletin_cellule')
+
+    # 3. Onglets individuels pour chaque étudiant
+    for etudiant in etudiants:
+        feuille = _Feuille(classeur, f"{etudiant.nom[:10]}_{etudiant.prenom[:10]}", LARGEURS_ETUDIANT)
+        feuille.ligne(["BULLETIN INDIVIDUEL"], 'bulletin_titre')
+        feuille.ligne()
+        feuille.libelle("Nom complet:", etudiant.nom_complet)
+        feuille.libelle("N° Étudiant:", etudiant.numero_etudiant)
+        feuille.libelle("Classe:", str(etudiant.classe))
+        feuille.libelle("Semestre:", semestre)
+        feuille.libelle("Année:", annee_scolaire)
+        feuille.ligne()
+
+        notes = matrice.notes_etudiant(etudiant.id)
+        if notes:
+            feuille.ligne(ENTETES_NOTES, 'bulletin_entete')
+            for note in notes:
+                feuille.ligne(_ligne_note(note), 'bulletin_cellule')
+
+            # Ligne de moyenne
+            moyenne = classement.resultat(etudiant.id)['moyenne']
+            feuille.ligne(["MOYENNE GÉNÉRALE", None, None, round(moyenne, 2)], 'bulletin_gras')
+        else:
+            feuille.ligne(["Aucune note trouvée pour ce semestre"])
+
+        if progression:
+            progression(1)
+
+    classeur.save(fichier)
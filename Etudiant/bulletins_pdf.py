@@ -0,0 +1,331 @@
+# bulletins_pdf.py
+# Rendu ReportLab des bulletins à partir de données simples (dictionnaires),
+# sans accès à l'ORM : ce module peut être importé tel quel par les processus
+# de rendu parallèle.
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+import itertools
+import multiprocessing
+import threading
+import zipfile
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import (
+    BaseDocTemplate, Flowable, Frame, PageBreak, PageTemplate, Paragraph, Spacer, Table, TableStyle
+)
+from reportlab.lib.units import cm
+
+
+# À incrémenter à chaque modification de la mise en page : invalide le cache des PDF
+VERSION_GABARIT = 2
+
+
+class GabaritBulletin:
+    """Styles et mise en page des bulletins.
+
+    Construit une seule fois par processus (voir `gabarit()`) puis partagé par tous
+    les bulletins : les ParagraphStyle et TableStyle ne sont plus recréés par étudiant.
+    """
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+
+        # Style personnalisé pour le titre
+        self.titre = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=30,
+            alignment=1,  # Centré
+            textColor=colors.darkblue
+        )
+        self.intertitre = styles['Heading2']
+        self.normal = styles['Normal']
+
+        self.style_infos = TableStyle([
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 10),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+        ])
+        self.style_notes = TableStyle([
+            # En-tête
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 6),
+
+            # Corps du tableau
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+            # Ligne de moyenne
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ])
+
+    def document(self, fichier):
+        """Document A4 avec un modèle de page unique ; chaque bulletin commence sur une nouvelle page"""
+        doc = BaseDocTemplate(fichier, pagesize=A4, topMargin=1*cm, bottomMargin=1*cm)
+        cadre = Frame(doc.leftMargin, doc.bottomMargin, doc.width, doc.height, id='contenu')
+        doc.addPageTemplates([PageTemplate(id='bulletin', frames=[cadre])])
+        return doc
+
+
+_gabarit = None
+
+
+def gabarit():
+    """Gabarit partagé du processus courant"""
+    global _gabarit
+    if _gabarit is None:
+        _gabarit = GabaritBulletin()
+    return _gabarit
+
+
+def generer_contenu_bulletin(donnees, gabarit_bulletin=None):
+    """Génère le contenu d'un bulletin à partir de ses données préparées"""
+
+    g = gabarit_bulletin or gabarit()
+    story = []
+
+    # En-tête du bulletin
+    story.append(Paragraph("BULLETIN DE NOTES", g.titre))
+    story.append(Spacer(1, 0.5*cm))
+
+    # Informations de l'étudiant
+    info_data = [
+        ['Nom complet:', donnees['nom_complet']],
+        ['Numéro étudiant:', donnees['numero_etudiant']],
+        ['Classe:', donnees['classe']],
+        ['Semestre:', donnees['semestre']],
+        ['Année scolaire:', donnees['annee_scolaire']],
+    ]
+    if donnees['rang']:
+        info_data.append(['Rang:', f"{donnees['rang']} / {donnees['effectif']}"])
+
+    story.append(Table(info_data, colWidths=[4*cm, 8*cm], style=g.style_infos))
+    story.append(Spacer(1, 1*cm))
+
+    notes = donnees['notes']
+
+    if notes:
+        # Tableau des notes
+        notes_data = [['Matière', 'Code', 'Note', 'Note/20', 'Type', 'Coefficient']]
+
+        for note in notes:
+            notes_data.append([
+                note['matiere_nom'],
+                note['matiere_code'],
+                f"{note['note']}/{note['note_sur']}",
+                f"{note['note_sur_vingt']:.2f}",
+                note['type_libelle'],
+                f"{note['coefficient']:.1f}"
+            ])
+
+        # Ajouter la ligne de moyenne
+        notes_data.append(['', '', '', '', 'MOYENNE GÉNÉRALE', f"{donnees['moyenne']:.2f}/20"])
+
+        story.append(Paragraph("DÉTAIL DES NOTES", g.intertitre))
+        story.append(Spacer(1, 0.3*cm))
+        story.append(Table(notes_data, colWidths=[4*cm, 2*cm, 2*cm, 2*cm, 3*cm, 2*cm], style=g.style_notes))
+        story.append(Spacer(1, 1*cm))
+
+        # Appréciation
+        story.append(Paragraph("APPRÉCIATION GÉNÉRALE", g.intertitre))
+        story.append(Spacer(1, 0.3*cm))
+        story.append(Paragraph(donnees['appreciation'], g.normal))
+
+    else:
+        story.append(Paragraph("Aucune note trouvée pour ce semestre.", g.normal))
+
+    # Pied de page
+    story.append(Spacer(1, 2*cm))
+    story.append(Paragraph(f"Bulletin généré le {donnees['date_generation']}", g.normal))
+
+    return story
+
+
+def generer_bulletin_etudiant_pdf(donnees, cache=None):
+    """Génère le PDF d'un bulletin individuel et renvoie son contenu (bytes).
+
+    Avec un `cache` (CachePdf), un bulletin déjà rendu avec les mêmes données est réutilisé.
+    """
+
+    if cache is not None:
+        contenu = cache.lire(donnees)
+        if contenu is not None:
+            return contenu
+
+    buffer = BytesIO()
+    g = gabarit()
+    g.document(buffer).build(generer_contenu_bulletin(donnees, g))
+    contenu = buffer.getvalue()
+
+    if cache is not None:
+        cache.ecrire(donnees, contenu)
+
+    return contenu
+
+
+class _Avancement(Flowable):
+    """Repère sans taille placé après un bulletin : signale sa mise en page à `progression`"""
+
+    def __init__(self, progression):
+        super().__init__()
+        self.progression = progression
+
+    def wrap(self, largeur, hauteur):
+        return 0, 0
+
+    def draw(self):
+        self.progression(1)
+
+
+def generer_bulletins_groupe_pdf(bulletins, fichier, progression=None):
+    """Écrit dans `fichier` un PDF regroupant les bulletins, un par page (PageBreak).
+
+    `progression` est appelée avec 1 à chaque bulletin mis en page.
+    Renvoie le nombre de pages produites.
+    """
+    g = gabarit()
+    doc = g.document(fichier)
+    story = []
+
+    for i, donnees in enumerate(bulletins):
+        if i > 0:
+            story.append(PageBreak())
+        story.extend(generer_contenu_bulletin(donnees, g))
+        if progression:
+            story.append(_Avancement(progression))
+
+    doc.build(story)
+    return doc.page
+
+
+# ================= RENDU PARALLÈLE =================
+
+_pool = None
+_pool_processus = 0
+_pool_verrou = threading.Lock()
+
+
+def _obtenir_pool(processus):
+    """Pool de processus partagé entre les requêtes, créé à la première utilisation"""
+    global _pool, _pool_processus
+    with _pool_verrou:
+        if _pool is None or _pool_processus != processus:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # 'spawn' : les workers ne dupliquent pas l'état (connexions, threads) du serveur
+            _pool = ProcessPoolExecutor(max_workers=processus, mp_context=multiprocessing.get_context('spawn'))
+            _pool_processus = processus
+        return _pool
+
+
+def _abandonner_pool(pool):
+    """Pool cassé (un processus de rendu est mort) : il sera recréé à la prochaine utilisation"""
+    global _pool
+    with _pool_verrou:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def rendre_bulletins(bulletins, processus=0, cache=None):
+    """Rend les PDF d'une liste de bulletins préparés.
+
+    Produit des couples (donnees, contenu_pdf) au fur et à mesure qu'ils sont prêts.
+    Avec `processus` > 1, le rendu est réparti sur un pool de processus et l'ordre
+    de sortie suit l'ordre de fin de rendu ; sinon il est fait dans le processus courant.
+    Au plus deux rendus par processus sont en cours à la fois, pour que la mémoire
+    ne dépende pas de la taille de la classe.
+    Les bulletins présents dans le `cache` sont produits sans passer par le pool.
+    Si un processus du pool meurt, le pool est abandonné et les bulletins restants
+    sont rendus dans le processus courant.
+    """
+    if processus <= 1 or len(bulletins) < 2:
+        for donnees in bulletins:
+            yield donnees, generer_bulletin_etudiant_pdf(donnees, cache)
+        return
+
+    pool = _obtenir_pool(processus)
+    en_cours = {}
+    restants = iter(bulletins)
+    # Bulletin dont la soumission au pool a échoué
+    refuse = None
+
+    def termines():
+        faits, _ = wait(en_cours, return_when=FIRST_COMPLETED)
+        for future in faits:
+            contenu = future.result()
+            yield en_cours.pop(future), contenu
+
+    try:
+        try:
+            for donnees in restants:
+                contenu = cache.lire(donnees) if cache is not None else None
+                if contenu is not None:
+                    yield donnees, contenu
+                    continue
+                refuse = donnees
+                en_cours[pool.submit(generer_bulletin_etudiant_pdf, donnees, cache)] = donnees
+                refuse = None
+                if len(en_cours) >= 2 * processus:
+                    yield from termines()
+            while en_cours:
+                yield from termines()
+        except BrokenProcessPool:
+            _abandonner_pool(pool)
+            a_refaire = list(en_cours.values()) + ([refuse] if refuse is not None else [])
+            en_cours.clear()
+            for donnees in itertools.chain(a_refaire, restants):
+                yield donnees, generer_bulletin_etudiant_pdf(donnees, cache)
+    finally:
+        # Client déconnecté ou erreur : on abandonne les rendus pas encore commencés
+        for future in en_cours:
+            future.cancel()
+
+
+# ================= ARCHIVE ZIP EN FLUX =================
+
+class _TamponZip:
+    """Fichier en écriture seule, non positionnable, vidé au fur et à mesure.
+
+    zipfile écrit alors chaque entrée avec un descripteur de données, sans revenir
+    en arrière, ce qui permet d'envoyer l'archive par morceaux.
+    """
+
+    def __init__(self):
+        self._morceaux = []
+
+    def write(self, data):
+        self._morceaux.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def vider(self):
+        data = b''.join(self._morceaux)
+        self._morceaux.clear()
+        return data
+
+
+def flux_zip(entrees):
+    """Construit une archive ZIP à partir de couples (nom, contenu) et la produit par morceaux.
+
+    Chaque entrée est envoyée dès qu'elle est écrite : seule l'entrée courante est en mémoire.
+    """
+    tampon = _TamponZip()
+    with zipfile.ZipFile(tampon, 'w') as zip_file:
+        for nom, contenu in entrees:
+            zip_file.writestr(nom, contenu)
+            yield tampon.vider()
+    # Répertoire central écrit à la fermeture de l'archive
+    yield tampon.vider()
@@ -0,0 +1,100 @@
+# cache_pdf.py
+# Cache disque des bulletins PDF rendus, adressé par le contenu du bulletin.
+# Comme bulletins_pdf, ce module n'utilise pas l'ORM : le cache est transmis
+# tel quel aux processus de rendu.
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+
+class CachePdf:
+    """Bulletins PDF rangés par compte et par étudiant, avec éviction LRU sur la taille totale.
+
+    Arborescence : <dossier>/<compte_id>/<etudiant_id>/<empreinte>.pdf
+    La date de modification d'un fichier sert de date de dernier accès.
+    """
+
+    def __init__(self, dossier, taille_max, version_gabarit):
+        self.dossier = Path(dossier)
+        self.taille_max = taille_max
+        self.version_gabarit = version_gabarit
+
+    def cle(self, donnees):
+        """Empreinte SHA-256 des données du bulletin et de la version du gabarit.
+
+        La date de génération imprimée (au jour près) fait partie des données : un PDF
+        en cache n'est réutilisé que le jour de son rendu.
+        """
+        contenu = dict(donnees, version_gabarit=self.version_gabarit)
+        serialise = json.dumps(contenu, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(serialise.encode('utf-8')).hexdigest()
+
+    def chemin(self, donnees):
+        return self.dossier / str(donnees['compte_id']) / str(donnees['etudiant_id']) / f"{self.cle(donnees)}.pdf"
+
+    def lire(self, donnees):
+        """Contenu du PDF en cache, ou None"""
+        chemin = self.chemin(donnees)
+        try:
+            contenu = chemin.read_bytes()
+        except OSError:
+            return None
+        try:
+            os.utime(chemin)
+        except OSError:
+            pass
+        return contenu
+
+    def ecrire(self, donnees, contenu):
+        """Enregistre un PDF rendu (écriture atomique par renommage)"""
+        chemin = self.chemin(donnees)
+        try:
+            chemin.parent.mkdir(parents=True, exist_ok=True)
+            fd, temporaire = tempfile.mkstemp(dir=chemin.parent, suffix='.part')
+            with os.fdopen(fd, 'wb') as fichier:
+                fichier.write(contenu)
+            os.replace(temporaire, chemin)
+        except OSError:
+            # Le cache est facultatif : un échec d'écriture ne bloque pas la génération
+            pass
+
+    def evincer(self):
+        """Supprime les PDF les moins récemment utilisés tant que le cache dépasse sa taille maximale"""
+        fichiers = []
+        taille = 0
+        for chemin in self.dossier.glob('*/*/*.pdf'):
+            try:
+                infos = chemin.stat()
+            except OSError:
+                continue
+            fichiers.append((infos.st_mtime, infos.st_size, chemin))
+            taille += infos.st_size
+
+        if taille <= self.taille_max:
+            return
+        for _, taille_fichier, chemin in sorted(fichiers):
+            chemin.unlink(missing_ok=True)
+            taille -= taille_fichier
+            if taille <= self.taille_max:
+                break
+
+    def invalider_etudiant(self, compte_id, etudiant_id):
+        shutil.rmtree(self.dossier / str(compte_id) / str(etudiant_id), ignore_errors=True)
+
+    def invalider_compte(self, compte_id):
+        shutil.rmtree(self.dossier / str(compte_id), ignore_errors=True)
+
+
+def cache_bulletins():
+    """Cache configuré par les settings (BULLETINS_CACHE_DIR), ou None s'il est désactivé"""
+    from django.conf import settings
+
+    from .bulletins_pdf import VERSION_GABARIT
+
+    dossier = getattr(settings, 'BULLETINS_CACHE_DIR', None)
+    if not dossier:
+        return None
+    return CachePdf(dossier, getattr(settings, 'BULLETINS_CACHE_TAILLE_MAX', 500 * 1024 * 1024), VERSION_GABARIT)
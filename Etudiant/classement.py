@@ -0,0 +1,157 @@
+# classement.py
+from decimal import Decimal
+
+import numpy as np
+from django.db import transaction
+
+from .models import Bulletin
+
+
+# Seuils des mentions (moyenne sur 20, borne incluse)
+SEUILS_MENTIONS = [10, 12, 14, 16]
+MENTIONS = ["Insuffisant", "Passable", "Assez Bien", "Bien", "Très Bien"]
+APPRECIATIONS = [
+    "Insuffisant - Beaucoup d'efforts nécessaires",
+    "Passable - Doit faire des efforts",
+    "Assez bien - Peut mieux faire",
+    "Bien - Continue ainsi",
+    "Très bien - Félicitations",
+]
+
+METHODES_RANG = ('competition', 'dense')
+
+
+def notes_sur_vingt(notes, notes_sur):
+    """Notes ramenées sur 20 ; une note sur 0 compte pour 0"""
+    notes = np.asarray(notes, dtype=float)
+    notes_sur = np.asarray(notes_sur, dtype=float)
+    resultat = np.zeros(len(notes))
+    np.divide(notes * 20, notes_sur, out=resultat, where=notes_sur != 0)
+    return resultat
+
+
+def moyennes_ponderees(index_etudiants, notes_sur_vingt, coefficients, nb_etudiants):
+    """Moyenne pondérée de chaque étudiant en un seul passage sur les tableaux de notes.
+
+    `index_etudiants` donne, pour chaque note, la position (0..nb_etudiants-1) de son
+    étudiant. Les étudiants sans note ont une moyenne NaN.
+    """
+    index_etudiants = np.asarray(index_etudiants, dtype=np.intp)
+    notes_sur_vingt = np.asarray(notes_sur_vingt, dtype=float)
+    coefficients = np.asarray(coefficients, dtype=float)
+
+    points = np.bincount(index_etudiants, weights=notes_sur_vingt * coefficients, minlength=nb_etudiants)
+    total_coefficients = np.bincount(index_etudiants, weights=coefficients, minlength=nb_etudiants)
+
+    moyennes = np.full(nb_etudiants, np.nan)
+    np.divide(points, total_coefficients, out=moyennes, where=total_coefficients > 0)
+    return moyennes
+
+
+def calculer_rangs(moyennes, methode='competition'):
+    """Rangs par moyenne décroissante, les ex æquo partageant le même rang.
+
+    - competition : 1, 2, 2, 4 (rang scolaire habituel)
+    - dense       : 1, 2, 2, 3
+
+    Les moyennes sont comparées à 2 décimales, comme elles sont affichées et stockées.
+    Les étudiants sans moyenne (NaN) reçoivent le rang 0, c'est-à-dire non classés.
+    """
+    if methode not in METHODES_RANG:
+        raise ValueError(f"Méthode de rang inconnue : {methode}")
+
+    moyennes = np.round(np.asarray(moyennes, dtype=float), 2)
+    classes = ~np.isnan(moyennes)
+    rangs = np.zeros(len(moyennes), dtype=np.int64)
+
+    # Tri croissant des opposés = tri décroissant des moyennes
+    valeurs = -moyennes[classes]
+    if methode == 'competition':
+        rangs[classes] = np.searchsorted(np.sort(valeurs), valeurs, side='left') + 1
+    else:
+        rangs[classes] = np.searchsorted(np.unique(valeurs), valeurs) + 1
+    return rangs
+
+
+def _libelles(moyennes, libelles):
+    moyennes = np.asarray(moyennes, dtype=float)
+    positions = np.searchsorted(SEUILS_MENTIONS, np.nan_to_num(moyennes, nan=-1.0), side='right')
+    resultat = np.asarray(libelles, dtype=object)[positions]
+    resultat[np.isnan(moyennes)] = None
+    return resultat
+
+
+def calculer_mentions(moyennes):
+    """Mention de chaque moyenne (None pour les étudiants sans note)"""
+    return _libelles(moyennes, MENTIONS)
+
+
+def calculer_appreciations(moyennes):
+    """Appréciation générale de chaque moyenne (None pour les étudiants sans note)"""
+    return _libelles(moyennes, APPRECIATIONS)
+
+
+class Classement:
+    """Moyennes, rangs, mentions et effectif d'une classe, calculés sur des tableaux NumPy.
+
+    Les tableaux sont alignés sur `ids_etudiants`.
+    """
+
+    def __init__(self, ids_etudiants, moyennes, methode='competition'):
+        self.ids_etudiants = np.asarray(ids_etudiants)
+        self.moyennes = np.round(np.asarray(moyennes, dtype=float), 2)
+        self.rangs = calculer_rangs(self.moyennes, methode)
+        self.mentions = calculer_mentions(self.moyennes)
+        self.appreciations = calculer_appreciations(self.moyennes)
+        # L'effectif compte les étudiants classés, c'est-à-dire ayant au moins une note
+        self.effectif = int(np.count_nonzero(self.rangs))
+        self._positions = {int(etudiant_id): i for i, etudiant_id in enumerate(self.ids_etudiants)}
+
+    def __len__(self):
+        return len(self.ids_etudiants)
+
+    def ordre(self):
+        """Positions des étudiants triées par rang, les non classés en dernier"""
+        cle = np.where(self.rangs > 0, self.rangs, len(self.rangs) + 1)
+        return np.argsort(cle, kind='stable')
+
+    def resultat(self, etudiant_id):
+        """Dictionnaire moyenne/rang/mention/appréciation d'un étudiant"""
+        i = self._positions[etudiant_id]
+        classe = self.rangs[i] > 0
+        return {
+            'moyenne': float(self.moyennes[i]) if classe else None,
+            'rang': int(self.rangs[i]) if classe else None,
+            'effectif': self.effectif,
+            'mention': self.mentions[i],
+            'appreciation': self.appreciations[i],
+        }
+
+
+def enregistrer_bulletins(classement, semestre, annee_scolaire, compte, user=None):
+    """Écrit moyenne générale, rang et effectif de tous les étudiants classés.
+
+    Un seul INSERT ... ON CONFLICT DO UPDATE sur la contrainte unique
+    (etudiant, semestre, annee_scolaire), dans une seule transaction.
+    """
+    bulletins = [
+        Bulletin(
+            etudiant_id=int(classement.ids_etudiants[i]),
+            semestre=semestre,
+            annee_scolaire=annee_scolaire,
+            moyenne_generale=Decimal(f"{classement.moyennes[i]:.2f}"),
+            rang=int(classement.rangs[i]),
+            effectif_classe=classement.effectif,
+            compte=compte,
+            genere_par=user,
+        )
+        for i in np.flatnonzero(classement.rangs)
+    ]
+    with transaction.atomic():
+        Bulletin.objects.bulk_create(
+            bulletins,
+            update_conflicts=True,
+            unique_fields=['etudiant', 'semestre', 'annee_scolaire'],
+            update_fields=['moyenne_generale', 'rang', 'effectif_classe', 'compte', 'genere_par', 'date_generation'],
+        )
+    return bulletins
@@ -0,0 +1,64 @@
+# compteurs.py
+# Compteurs du tableau de bord (CompteStats) tenus à jour par variations : chaque
+# création ou suppression ajoute ou retire 1 en une requête UPDATE, les écritures
+# groupées (import, saisie rapide, grille) ajoutent leur nombre de créations.
+# Le tableau de bord lit alors une seule ligne au lieu de compter les tables.
+# Commande de recalcul complet : python manage.py recalculer_compteurs
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Classe, CompteStats, Etudiant, Matiere, Note
+
+
+# Compteur -> QuerySet qu'il compte pour un compte donné
+REQUETES = {
+    'nb_etudiants': lambda compte_id: Etudiant.objects.filter(compte_id=compte_id, actif=True),
+    'nb_classes': lambda compte_id: Classe.objects.filter(compte_id=compte_id),
+    'nb_matieres': lambda compte_id: Matiere.objects.filter(compte_id=compte_id, actif=True),
+    'nb_notes': lambda compte_id: Note.objects.filter(compte_id=compte_id),
+}
+
+
+def ajuster(compte_id, **variations):
+    """Ajoute les variations (ex. nb_notes=3, nb_etudiants=-1) aux compteurs du compte.
+
+    Sans ligne CompteStats (compte jamais affiché), rien n'est écrit : la ligne sera
+    calculée entièrement à la première lecture.
+    """
+    variations = {champ: variation for champ, variation in variations.items() if variation}
+    if compte_id is None or not variations:
+        return
+    CompteStats.objects.filter(compte_id=compte_id).update(
+        date_maj=timezone.now(),
+        **{champ: Greatest(F(champ) + variation, 0) for champ, variation in variations.items()},
+    )
+
+
+def recompter(compte_id, *champs):
+    """Recalcule par COUNT(*) les compteurs indiqués d'une ligne existante"""
+    CompteStats.objects.filter(compte_id=compte_id).update(
+        date_maj=timezone.now(),
+        **{champ: REQUETES[champ](compte_id).count() for champ in champs},
+    )
+
+
+def recalculer(compte_id):
+    """Calcule tous les compteurs du compte par COUNT(*) ; renvoie la ligne CompteStats"""
+    # Dans une transaction : les comptages sont lus sur la base principale, jamais
+    # sur la réplique (les variations suivantes partiront de ces valeurs)
+    with transaction.atomic():
+        stats, _ = CompteStats.objects.update_or_create(
+            compte_id=compte_id,
+            defaults={champ: requete(compte_id).count() for champ, requete in REQUETES.items()},
+        )
+    return stats
+
+
+def stats_compte(compte):
+    """Compteurs du compte en une lecture par clé primaire (calculés la première fois)"""
+    try:
+        return CompteStats.objects.get(compte=compte)
+    except CompteStats.DoesNotExist:
+        return recalculer(compte.pk)
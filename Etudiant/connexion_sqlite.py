@@ -0,0 +1,27 @@
+# connexion_sqlite.py
+# Pragmas appliqués à chaque nouvelle connexion SQLite, déclarés par base sous la
+# clé PRAGMAS de settings.DATABASES (journal WAL, synchronous, cache...).
+# Avec CONN_MAX_AGE, une connexion est réutilisée d'une requête à l'autre : ce
+# réglage n'est alors fait qu'une fois par connexion et par processus.
+import re
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+_NOM = re.compile(r'^[a-z_]+$')
+_VALEUR = re.compile(r'^-?\w+$')
+
+
+@receiver(connection_created)
+def appliquer_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = connection.settings_dict.get('PRAGMAS') or {}
+    with connection.cursor() as curseur:
+        for nom, valeur in pragmas.items():
+            # Les PRAGMA n'acceptent pas de paramètres : nom et valeur sont vérifiés
+            if not _NOM.match(nom) or not _VALEUR.match(str(valeur)):
+                raise ImproperlyConfigured(f"PRAGMA invalide dans DATABASES : {nom} = {valeur!r}")
+            curseur.execute(f'PRAGMA {nom} = {valeur}')
@@ -1,10 +1,14 @@
 # forms.py
 from django import forms
 from django.core.exceptions import ValidationError
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import Classe, Etudiant, Matiere, Note, Bulletin
+from .models import Classe, Etudiant, Matiere, Note
+from .importation import MODES_IMPORT
+from . import references
+from .references import ChoixEnCache
 import datetime
-from utilisateurs.models import ProfilUtilisateur,Compte
+from decimal import Decimal
 class ClasseForm(forms.ModelForm):
     """Formulaire pour la gestion des classes"""
     
@@ -51,6 +55,7 @@ class EtudiantForm(forms.ModelForm):
             'numero_etudiant', 'nom', 'prenom', 'date_naissance', 
             'sexe', 'adresse', 'telephone', 'email', 'classe', 'actif'
         ]
+        field_classes = {'classe': ChoixEnCache}
         widgets = {
             'numero_etudiant': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -94,16 +99,11 @@ class EtudiantForm(forms.ModelForm):
         
         
     def __init__(self, *args, **kwargs):
-        user = kwargs.pop('user', None)  # récupérer l'utilisateur connecté
+        compte = kwargs.pop('compte', None)  # compte de l'utilisateur connecté (request.compte)
         super().__init__(*args, **kwargs)
         
-        if user:
-            try:
-                profil = ProfilUtilisateur.objects.get(user=user)
-                compte = profil.compte
-                self.fields['classe'].queryset = Classe.objects.filter(compte=compte)
-            except ProfilUtilisateur.DoesNotExist:
-                self.fields['classe'].queryset = Classe.objects.none()
+        if compte:
+            self.fields['classe'].charger(Classe.objects.filter(compte=compte), references.classes(compte))
                 
     
     def clean_date_naissance(self):
@@ -133,6 +133,7 @@ class MatiereForm(forms.ModelForm):
     class Meta:
         model = Matiere
         fields = ['nom', 'code', 'coefficient', 'description', 'enseignant', 'actif']
+        field_classes = {'enseignant': ChoixEnCache}
         widgets = {
             'nom': forms.TextInput(attrs={
                 'class': 'form-control',
@@ -162,36 +163,23 @@ class MatiereForm(forms.ModelForm):
         }
     
     def __init__(self, *args, **kwargs):
-            utilisateur_connecte = kwargs.pop('user', None)  # on récupère l'utilisateur connecté
-            print(f'l\'uti : {utilisateur_connecte}')
-            super().__init__(*args, **kwargs)
-
-            if utilisateur_connecte and not utilisateur_connecte.is_superuser:
-                try:
-                    # Vérifie que l'utilisateur a un profil avec un compte
-                    profil = ProfilUtilisateur.objects.get(user=utilisateur_connecte)
-                    compte = profil.compte
-
-                    if compte:
-                        print(f"Compte trouvé : {compte}")
-
-                        # Tous les utilisateurs liés à ce compte
-                        utilisateurs_du_compte = ProfilUtilisateur.objects.filter(compte=compte).values_list('user', flat=True)
-
-                        # Limiter aux utilisateurs du compte uniquement
-                        self.fields['enseignant'].queryset = User.objects.filter(id__in=utilisateurs_du_compte)
-                        self.fields['enseignant'].empty_label = "Sélectionner un enseignant"
-                    else:
-                        print("Aucun compte associé.")
-                        self.fields['enseignant'].queryset = User.objects.none()
+        utilisateur_connecte = kwargs.pop('user', None)  # on récupère l'utilisateur connecté
+        compte = kwargs.pop('compte', None)  # et son compte (request.compte)
+        super().__init__(*args, **kwargs)
 
-                except ProfilUtilisateur.DoesNotExist:
-                    print("L'utilisateur connecté n'a pas de profil.")
-                    self.fields['enseignant'].queryset = User.objects.none()
-            else:
-                # Cas des superusers ou utilisateurs sans compte : tu peux autoriser tous les users actifs (optionnel)
-                self.fields['enseignant'].queryset = User.objects.filter(is_active=True)
+        if utilisateur_connecte and not utilisateur_connecte.is_superuser:
+            if compte:
+                # Limiter aux utilisateurs du compte uniquement
+                self.fields['enseignant'].charger(
+                    User.objects.filter(profilutilisateur__compte=compte), references.enseignants(compte)
+                )
                 self.fields['enseignant'].empty_label = "Sélectionner un enseignant"
+            else:
+                self.fields['enseignant'].queryset = User.objects.none()
+        else:
+            # Cas des superusers : tous les utilisateurs actifs
+            self.fields['enseignant'].queryset = User.objects.filter(is_active=True)
+            self.fields['enseignant'].empty_label = "Sélectionner un enseignant"
 
 
 class NoteForm(forms.ModelForm):
@@ -203,6 +191,7 @@ class NoteForm(forms.ModelForm):
             'etudiant', 'matiere', 'note', 'note_sur', 'type_evaluation',
             'date_evaluation', 'semestre', 'commentaire'
         ]
+        field_classes = {'matiere': ChoixEnCache}
         widgets = {
             'etudiant': forms.Select(attrs={
                 'class': 'form-control'
@@ -243,7 +232,12 @@ class NoteForm(forms.ModelForm):
     
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop('user', None)  # accepter l'argument user mais ne rien en faire
+        compte = kwargs.pop('compte', None)  # compte de l'utilisateur connecté (request.compte)
         super().__init__(*args, **kwargs)
+        
+        # Uniquement les étudiants et matières du compte
+        self.fields['etudiant'].queryset = Etudiant.objects.filter(compte=compte)
+        self.fields['matiere'].charger(Matiere.objects.filter(compte=compte), references.matieres(compte))
     
     def clean(self):
         cleaned_data = super().clean()
@@ -265,8 +259,8 @@ class NoteForm(forms.ModelForm):
 class NoteRapideForm(forms.Form):
     """Formulaire pour la saisie rapide de notes pour une classe entière"""
     
-    matiere = forms.ModelChoiceField(
-        queryset=Matiere.objects.filter(actif=True),
+    matiere = ChoixEnCache(
+        queryset=Matiere.objects.none(),
         widget=forms.Select(attrs={'class': 'form-control'}),
         label="Matière"
     )
@@ -286,13 +280,21 @@ class NoteRapideForm(forms.Form):
     )
     note_sur = forms.DecimalField(
         initial=20,
+        min_value=Decimal('0.01'),
+        max_digits=4,
+        decimal_places=2,
         widget=forms.NumberInput(attrs={'class': 'form-control'}),
         label="Note sur"
     )
     
     def __init__(self, *args, **kwargs):
         self.user = kwargs.pop('user', None)  # accepte user mais ne fait rien
+        compte = kwargs.pop('compte', None)  # compte de l'utilisateur connecté (request.compte)
         super().__init__(*args, **kwargs)
+        
+        self.fields['matiere'].charger(
+            Matiere.objects.filter(compte=compte, actif=True), references.matieres(compte, actives=True)
+        )
 
 
 
@@ -303,6 +305,7 @@ class ImportDonneesForm(forms.Form):
         ('etudiants', 'Étudiants'),
         ('classe', 'Classes'),
         ('matieres', 'Matières'),
+        ('notes', 'Notes'),
     ]
     
     type_import = forms.ChoiceField(
@@ -318,7 +321,25 @@ class ImportDonneesForm(forms.Form):
         label="Fichier à importer",
         help_text="Formats acceptés: Excel (.xlsx, .xls) ou CSV (.csv)"
     )
+    mode = forms.ChoiceField(
+        choices=MODES_IMPORT,
+        initial='ajout',
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label="Lignes déjà présentes",
+        help_text="La simulation affiche les ajouts et modifications sans rien enregistrer"
+    )
     
+    def clean_mode(self):
+        return self.cleaned_data.get('mode') or 'ajout'
+
+    @property
+    def taille_max(self):
+        return settings.IMPORT_TAILLE_MAX
+
+    @property
+    def taille_max_mo(self):
+        return self.taille_max // (1024 * 1024)
 
     def clean_fichier(self):
         fichier = self.cleaned_data['fichier']
@@ -335,8 +356,8 @@ class ImportDonneesForm(forms.Form):
         if mime_type not in ['application/vnd.ms-excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'text/csv']:
             raise ValidationError("Le contenu du fichier ne correspond pas à un format Excel ou CSV valide.")
 
-        if fichier.size > 5 * 1024 * 1024:
-            raise ValidationError("Le fichier est trop volumineux (max 5MB)")
+        if fichier.size > self.taille_max:
+            raise ValidationError(f"Le fichier est trop volumineux (max {self.taille_max_mo}MB)")
 
         return fichier
 
@@ -351,7 +372,7 @@ class RechercheEtudiantForm(forms.Form):
         }),
         label="Recherche"
     )
-    classe = forms.ModelChoiceField(
+    classe = ChoixEnCache(
         queryset=Classe.objects.none(),
         required=False,
         empty_label="Toutes les classes",
@@ -366,32 +387,27 @@ class RechercheEtudiantForm(forms.Form):
     )
     
     def __init__(self, *args, **kwargs):
-        user = kwargs.pop('user', None)  # Récupère l'utilisateur connecté
+        compte = kwargs.pop('compte', None)  # compte de l'utilisateur connecté (request.compte)
         super().__init__(*args, **kwargs)
         
-         
-        if user:
-            try:
-                # On récupère le profil utilisateur lié à ce user
-                profil = ProfilUtilisateur.objects.get(user=user)
-
-                # Puis on récupère le compte lié au profil
-                compte = profil.compte
-
-                # Enfin on filtre les classes liées à ce compte
-                self.fields['classe'].queryset = Classe.objects.filter(compte=compte)
-            except ProfilUtilisateur.DoesNotExist:
-                # Pas de profil : pas de classes visibles
-                self.fields['classe'].queryset = Classe.objects.none()
+        # Sans compte : pas de classes visibles
+        if compte:
+            self.fields['classe'].charger(Classe.objects.filter(compte=compte), references.classes(compte))
 
 class GenerationBulletinForm(forms.Form):
     """Formulaire pour la génération de bulletins"""
     
-    classe = forms.ModelChoiceField(
-        queryset=Classe.objects.all(),
+    classe = ChoixEnCache(
+        queryset=Classe.objects.none(),
+        required=False,
         widget=forms.Select(attrs={'class': 'form-control'}),
         label="Classe"
     )
+    toutes_classes = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label="Toutes les classes du compte"
+    )
     semestre = forms.CharField(
         max_length=2,
         widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'S1'}),
@@ -410,4 +426,61 @@ class GenerationBulletinForm(forms.Form):
         ],
         widget=forms.Select(attrs={'class': 'form-control'}),
         label="Format d'export"
-    )
\ No newline at end of file
+    )
+    arriere_plan = forms.BooleanField(
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'}),
+        label="Générer en arrière-plan"
+    )
+    
+    def __init__(self, *args, **kwargs):
+        compte = kwargs.pop('compte', None)  # compte de l'utilisateur connecté (request.compte)
+        super().__init__(*args, **kwargs)
+        
+        self.fields['classe'].charger(Classe.objects.filter(compte=compte), references.classes(compte))
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        
+        if cleaned_data.get('toutes_classes'):
+            # Toute l'école : toujours traité par le worker
+            cleaned_data['arriere_plan'] = True
+        elif not cleaned_data.get('classe'):
+            self.add_error('classe', "Sélectionnez une classe ou cochez « Toutes les classes du compte ».")
+        
+        return cleaned_data
+
+
+class StatistiquesForm(forms.Form):
+    """Filtres des statistiques de classe"""
+
+    classe = ChoixEnCache(
+        queryset=Classe.objects.none(),
+        required=False,
+        empty_label="Toutes les classes",
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label="Classe"
+    )
+    semestre = forms.CharField(
+        max_length=2,
+        required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'S1'}),
+        label="Semestre"
+    )
+    matiere = ChoixEnCache(
+        queryset=Matiere.objects.none(),
+        required=False,
+        empty_label="Toutes les matières",
+        widget=forms.Select(attrs={'class': 'form-control'}),
+        label="Matière"
+    )
+
+    def __init__(self, *args, **kwargs):
+        compte = kwargs.pop('compte', None)  # compte de l'utilisateur connecté (request.compte)
+        super().__init__(*args, **kwargs)
+
+        self.fields['classe'].charger(Classe.objects.filter(compte=compte), references.classes(compte))
+        self.fields['matiere'].charger(Matiere.objects.filter(compte=compte), references.matieres(compte))
+
+    def clean_semestre(self):
+        return self.cleaned_data['semestre'].strip().upper()
@@ -0,0 +1,246 @@
+# grille_notes.py
+# Grille de notes façon tableur : une classe × une matière × les évaluations d'un
+# semestre, chargée en deux requêtes et modifiée par lots de cellules.
+# Chaque note porte un jeton `version` : une cellule n'est écrite que si le client
+# a lu la version courante (concurrence optimiste), sinon elle est renvoyée en conflit.
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from . import statistiques
+from .compteurs import ajuster
+from .models import Etudiant, Note
+from .saisie_notes import valider_note
+
+
+TYPES_EVALUATION = dict(Note.TYPE_EVALUATION_CHOICES)
+
+# Nombre maximal de cellules acceptées par requête
+CELLULES_MAX = 5000
+
+CENTIEME = Decimal('0.01')
+
+
+def cle_evaluation(type_evaluation, date_evaluation):
+    """Clé de colonne d'une évaluation : 'DS|2025-01-10'"""
+    return f"{type_evaluation}|{date_evaluation.isoformat()}"
+
+
+def lire_cle_evaluation(cle):
+    """Inverse de `cle_evaluation` ; lève ValueError si la clé est invalide"""
+    type_evaluation, _, jour = str(cle).partition('|')
+    if type_evaluation not in TYPES_EVALUATION:
+        raise ValueError("Type d'évaluation inconnu")
+    return type_evaluation, date.fromisoformat(jour)
+
+
+def _cellule(note):
+    return {
+        'id': note.id,
+        'note': str(note.note),
+        'note_sur': str(note.note_sur),
+        'version': note.version,
+    }
+
+
+class GrilleNotes:
+    """Notes d'une matière pour les étudiants actifs d'une classe, sur un semestre"""
+
+    def __init__(self, compte, classe, matiere, semestre):
+        self.compte = compte
+        self.classe = classe
+        self.matiere = matiere
+        self.semestre = semestre
+        self.etudiants = list(
+            Etudiant.objects.filter(classe=classe, compte=compte, actif=True)
+            .order_by('nom', 'prenom')
+            .only('id', 'numero_etudiant', 'nom', 'prenom')
+        )
+        self.ids_etudiants = {etudiant.id for etudiant in self.etudiants}
+
+    def notes(self):
+        return Note.objects.filter(
+            etudiant__classe=self.classe,
+            etudiant__actif=True,
+            matiere=self.matiere,
+            semestre=self.semestre,
+        ).only('id', 'etudiant_id', 'note', 'note_sur', 'type_evaluation', 'date_evaluation', 'version')
+
+    def donnees(self):
+        """Grille complète en types simples (pour JsonResponse)"""
+        evaluations = {}
+        cellules = {}
+        for note in self.notes().order_by('date_evaluation', 'type_evaluation'):
+            cle = cle_evaluation(note.type_evaluation, note.date_evaluation)
+            evaluations.setdefault(cle, {
+                'cle': cle,
+                'type_evaluation': note.type_evaluation,
+                'libelle': TYPES_EVALUATION[note.type_evaluation],
+                'date_evaluation': note.date_evaluation.isoformat(),
+            })
+            cellules.setdefault(note.etudiant_id, {})[cle] = _cellule(note)
+
+        return {
+            'classe': {'id': self.classe.id, 'nom': self.classe.nom},
+            'matiere': {'id': self.matiere.id, 'code': self.matiere.code, 'nom': self.matiere.nom},
+            'semestre': self.semestre,
+            'evaluations': list(evaluations.values()),
+            'etudiants': [
+                {
+                    'id': etudiant.id,
+                    'numero_etudiant': etudiant.numero_etudiant,
+                    'nom': etudiant.nom,
+                    'prenom': etudiant.prenom,
+                    'notes': cellules.get(etudiant.id, {}),
+                }
+                for etudiant in self.etudiants
+            ],
+        }
+
+    def lire(self, cellules):
+        """Vérifie les cellules envoyées par le client.
+
+        Chaque cellule : {"etudiant", "evaluation", "note", "note_sur" (facultatif),
+        "version"}. `version` vaut null pour une cellule vide côté client ; une note
+        vide ou null supprime la note existante.
+        Renvoie (changements, erreurs) ; `erreurs` liste les cellules refusées avec leur index.
+        """
+        changements = []
+        erreurs = []
+        vues = set()
+        for index, cellule in enumerate(cellules):
+            def refuser(message):
+                erreurs.append({'index': index, 'erreur': message})
+
+            if not isinstance(cellule, dict):
+                refuser("Cellule invalide")
+                continue
+            try:
+                etudiant_id = int(cellule.get('etudiant'))
+            except (TypeError, ValueError):
+                etudiant_id = None
+            if etudiant_id not in self.ids_etudiants:
+                refuser("Étudiant inconnu pour cette classe")
+                continue
+            try:
+                type_evaluation, date_evaluation = lire_cle_evaluation(cellule.get('evaluation'))
+            except ValueError:
+                refuser("Évaluation invalide (TYPE|AAAA-MM-JJ attendu)")
+                continue
+            cle = (etudiant_id, type_evaluation, date_evaluation)
+            if cle in vues:
+                refuser("Cellule présente plusieurs fois dans la requête")
+                continue
+            vues.add(cle)
+
+            version = cellule.get('version')
+            if isinstance(version, str) and version.isdigit():
+                version = int(version)
+            if version is not None and (isinstance(version, bool) or not isinstance(version, int)):
+                refuser("Version invalide")
+                continue
+
+            try:
+                note_sur = Decimal(str(cellule.get('note_sur') or '20').replace(',', '.'))
+            except InvalidOperation:
+                note_sur = None
+            if note_sur is None or not note_sur.is_finite() or not (0 < note_sur < 100) \
+                    or note_sur != note_sur.quantize(CENTIEME):
+                refuser("Barème entre 0 et 100 attendu")
+                continue
+
+            valeur = cellule.get('note')
+            if valeur is None or str(valeur).strip() == '':
+                valeur = None
+            else:
+                valeur, erreur = valider_note(valeur, note_sur)
+                if erreur:
+                    refuser(erreur)
+                    continue
+
+            changements.append({
+                'index': index,
+                'cle': cle,
+                # Même forme que les valeurs relues en base (deux décimales)
+                'note': valeur.quantize(CENTIEME) if valeur is not None else None,
+                'note_sur': note_sur.quantize(CENTIEME),
+                'version': version,
+            })
+        return changements, erreurs
+
+    def appliquer(self, changements, user):
+        """Écrit les changements lus par `lire` dans une transaction.
+
+        Les notes concernées sont relues (verrouillées sur les bases qui le permettent)
+        puis comparées à la version envoyée ; les cellules à jour sont écrites par
+        bulk_update / bulk_create / delete, les autres sont renvoyées en conflit
+        avec la valeur courante pour que le client la réaffiche.
+        """
+        resultat = {'modifiees': [], 'creees': [], 'supprimees': [], 'conflits': []}
+        if not changements:
+            return resultat
+
+        with transaction.atomic():
+            existantes = {
+                (note.etudiant_id, note.type_evaluation, note.date_evaluation): note
+                for note in Note.objects.select_for_update().filter(
+                    matiere=self.matiere,
+                    etudiant_id__in={c['cle'][0] for c in changements},
+                    date_evaluation__in={c['cle'][2] for c in changements},
+                ).only('id', 'etudiant_id', 'note', 'note_sur', 'type_evaluation', 'date_evaluation', 'version')
+            }
+
+            a_modifier, a_creer, a_supprimer = [], [], []
+            for changement in changements:
+                etudiant_id, type_evaluation, date_evaluation = changement['cle']
+                note = existantes.get(changement['cle'])
+                position = {
+                    'index': changement['index'],
+                    'etudiant': etudiant_id,
+                    'evaluation': cle_evaluation(type_evaluation, date_evaluation),
+                }
+
+                if (note.version if note else None) != changement['version']:
+                    resultat['conflits'].append({**position, 'actuelle': _cellule(note) if note else None})
+                elif note is None:
+                    if changement['note'] is not None:
+                        a_creer.append((position, Note(
+                            etudiant_id=etudiant_id,
+                            matiere=self.matiere,
+                            compte=self.compte,
+                            note=changement['note'],
+                            note_sur=changement['note_sur'],
+                            type_evaluation=type_evaluation,
+                            date_evaluation=date_evaluation,
+                            semestre=self.semestre,
+                            modifie_par=user,
+                        )))
+                elif changement['note'] is None:
+                    a_supprimer.append((position, note))
+                else:
+                    note.note = changement['note']
+                    note.note_sur = changement['note_sur']
+                    # Ligne verrouillée depuis sa lecture : la version lue est la version courante
+                    note.version += 1
+                    note.modifie_par = user
+                    a_modifier.append((position, note))
+
+            if a_modifier:
+                Note.objects.bulk_update(
+                    [note for _, note in a_modifier],
+                    ['note', 'note_sur', 'version', 'modifie_par'],
+                )
+            if a_creer:
+                Note.objects.bulk_create([note for _, note in a_creer])
+                ajuster(self.compte.pk, nb_notes=len(a_creer))
+            if a_modifier or a_creer:
+                # bulk_update / bulk_create n'envoient pas de signaux (les suppressions, si)
+                statistiques.invalider(self.compte.pk)
+            if a_supprimer:
+                Note.objects.filter(pk__in=[note.pk for _, note in a_supprimer]).delete()
+
+        resultat['modifiees'] = [{**position, **_cellule(note)} for position, note in a_modifier]
+        resultat['creees'] = [{**position, **_cellule(note)} for position, note in a_creer]
+        resultat['supprimees'] = [position for position, _ in a_supprimer]
+        return resultat
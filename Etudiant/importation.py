@@ -0,0 +1,587 @@
+# importation.py
+# Import en masse depuis un fichier CSV/Excel : validation colonne par colonne avec
+# pandas, données existantes chargées en une requête, insertion par lots dans une
+# transaction. Chaque ligne refusée est consignée dans un rapport.
+from abc import ABC, abstractmethod
+from datetime import date, datetime
+from itertools import islice
+
+import pandas as pd
+from django.db import transaction
+from django.db.models import F
+from openpyxl import load_workbook
+
+from utilisateurs.models import ProfilUtilisateur
+
+from . import references, statistiques
+from .compteurs import ajuster, recompter
+from .models import Classe, Etudiant, Matiere, Note
+from .recherche import indexer_etudiants
+
+
+# Numéro de ligne affiché = index pandas + 2 (ligne d'en-tête, numérotation à partir de 1)
+DECALAGE_LIGNES = 2
+
+TAILLE_LOT = 1000
+
+# Lignes lues, validées et insérées à la fois : la mémoire ne dépend pas de la taille du fichier
+TAILLE_LOT_LECTURE = 5000
+
+# Au-delà, le rapport affiché est tronqué (le total reste exact)
+ERREURS_AFFICHEES = 500
+
+MOTIF_EMAIL = r'^[^@\s]+@[^@\s]+\.[^@\s]+$'
+
+
+def _normaliser(df):
+    """Noms de colonnes et cellules en chaînes sans espaces superflus ; cellules vides -> ''"""
+    df.columns = [str(colonne).strip() for colonne in df.columns]
+    return df.fillna('').apply(lambda colonne: colonne.astype(str).str.strip())
+
+
+def _texte(valeur):
+    """Valeur d'une cellule Excel convertie comme le ferait la lecture d'un CSV"""
+    if valeur is None:
+        return ''
+    if isinstance(valeur, datetime):
+        return valeur.isoformat(sep=' ')
+    if isinstance(valeur, date):
+        return valeur.isoformat()
+    if isinstance(valeur, float) and valeur.is_integer():
+        return str(int(valeur))
+    return str(valeur)
+
+
+def _lots_csv(fichier, taille_lot):
+    # L'index continue d'un lot à l'autre : les numéros de ligne restent ceux du fichier
+    # index_col=False : une ligne avec trop de champs ne décale pas l'index
+    for lot in pd.read_csv(fichier, dtype=str, keep_default_na=False, index_col=False, chunksize=taille_lot):
+        yield _normaliser(lot)
+
+
+def _lots_xlsx(fichier, taille_lot):
+    classeur = load_workbook(fichier, read_only=True, data_only=True)
+    try:
+        lignes = classeur.worksheets[0].iter_rows(values_only=True)
+        entetes = [_texte(valeur) for valeur in next(lignes, ())]
+        debut = 0
+        while True:
+            lot = [[_texte(valeur) for valeur in ligne] for ligne in islice(lignes, taille_lot)]
+            if not lot and debut:
+                break
+            # Lignes plus courtes ou plus longues que l'en-tête : complétées ou coupées
+            lot = [(ligne + [''] * len(entetes))[:len(entetes)] for ligne in lot]
+            index = pd.RangeIndex(debut, debut + len(lot))
+            yield _normaliser(pd.DataFrame(lot, columns=entetes, index=index, dtype=str))
+            if len(lot) < taille_lot:
+                break
+            debut += len(lot)
+    finally:
+        classeur.close()
+
+
+def lire_par_lots(fichier, taille_lot=TAILLE_LOT_LECTURE):
+    """Lit un fichier CSV ou Excel par lots de `taille_lot` lignes (DataFrames de chaînes).
+
+    Les valeurs sont gardées telles quelles (un numéro "00123" reste "00123") ;
+    les cellules vides deviennent des chaînes vides. Au moins un lot est produit,
+    éventuellement vide, pour que les colonnes puissent être vérifiées.
+    Les anciens fichiers .xls ne peuvent pas être lus en flux : ils sont lus en un seul lot.
+    """
+    nom = fichier.name.lower()
+    if nom.endswith('.csv'):
+        return _lots_csv(fichier, taille_lot)
+    if nom.endswith('.xlsx'):
+        return _lots_xlsx(fichier, taille_lot)
+    return iter([_normaliser(pd.read_excel(fichier, dtype=str))])
+
+
+MODES_IMPORT = [
+    ('ajout', 'Ajouter les nouvelles lignes (ignorer les existantes)'),
+    ('simulation', 'Simuler la mise à jour (aucune écriture)'),
+    ('mise_a_jour', 'Mettre à jour : ajouter les nouvelles lignes et modifier celles qui diffèrent'),
+]
+
+
+class RapportImport:
+    """Bilan d'un import : lignes créées, modifiées, inchangées, ignorées et erreurs ligne par ligne"""
+
+    def __init__(self, mode='ajout'):
+        self.mode = mode
+        self.nb_lignes = 0
+        self.nb_importes = 0
+        self.nb_modifies = 0
+        self.nb_inchanges = 0
+        self.nb_ignores = 0
+        self.nb_erreurs = 0
+        self.erreurs = []
+
+    @property
+    def simulation(self):
+        return self.mode == 'simulation'
+
+    def ajouter(self, lignes, colonne, message, valeurs):
+        """Consigne une erreur pour chaque ligne de l'index `lignes`"""
+        self.nb_erreurs += len(lignes)
+        place = ERREURS_AFFICHEES - len(self.erreurs)
+        for ligne, valeur in zip(lignes[:place], valeurs.iloc[:place]):
+            self.erreurs.append({
+                'ligne': int(ligne) + DECALAGE_LIGNES,
+                'colonne': colonne,
+                'valeur': valeur,
+                'message': message,
+            })
+
+    @property
+    def erreurs_tronquees(self):
+        return self.nb_erreurs > len(self.erreurs)
+
+
+class ColonnesManquantes(Exception):
+    pass
+
+
+class Importateur(ABC):
+    """Base des imports : vérifie les colonnes, valide, compare à la base puis écrit par lots.
+
+    Les sous-classes décrivent leurs colonnes (dont celles qui peuvent manquer,
+    `facultatives`), la clé qui identifie une ligne existante (`cle`), les champs
+    modifiables (`champs`), et implémentent `valider`, `requete_existants` et `construire`.
+
+    Modes :
+    - ajout       : les lignes déjà en base sont ignorées ;
+    - simulation  : calcule créations / modifications / lignes inchangées sans rien écrire ;
+                    les lots sont validés comme à l'import réel (clés répétées d'un lot
+                    à l'autre comprises), les chiffres sont donc ceux qu'il produira ;
+    - mise_a_jour : crée les nouvelles lignes et ne modifie que celles qui diffèrent.
+    """
+
+    modele = None
+    colonnes = []
+    facultatives = []
+    cle = []
+    champs = []
+    # Champs réécrits sur toute ligne modifiée (ex. auteur de la modification)
+    champs_suivi = []
+    # Compteur de CompteStats augmenté du nombre de lignes créées
+    compteur = None
+    libelle = ""
+
+    def __init__(self, compte, user=None, mode='ajout'):
+        self.compte = compte
+        self.user = user
+        self.mode = mode
+
+    def verifier_colonnes(self, df):
+        manquantes = [
+            colonne for colonne in self.colonnes
+            if colonne not in df.columns and colonne not in self.facultatives
+        ]
+        if manquantes:
+            raise ColonnesManquantes(f"Colonne(s) manquante(s) : {', '.join(manquantes)}")
+
+    # --- Outils de validation vectorisée ---
+
+    def refuser(self, df, masque, colonne, message):
+        """Marque en erreur les lignes encore valides désignées par `masque`"""
+        masque = masque & self.valides
+        if masque.any():
+            self.rapport.ajouter(df.index[masque], colonne, message, df.loc[masque, colonne])
+            self.valides &= ~masque
+
+    def exiger(self, df, colonne, longueur_max=None):
+        self.refuser(df, df[colonne] == '', colonne, "Valeur obligatoire")
+        if longueur_max:
+            self.limiter(df, colonne, longueur_max)
+
+    def limiter(self, df, colonne, longueur_max):
+        self.refuser(df, df[colonne].str.len() > longueur_max, colonne, f"{longueur_max} caractères maximum")
+
+    def doublons_fichier(self, df, colonnes, libelle, colonne_rapport=None):
+        """Refuse les répétitions dans le fichier, dans le lot comme d'un lot à l'autre
+        (la première occurrence est gardée)"""
+        colonne_rapport = colonne_rapport or colonnes[0]
+        message = f"{libelle} en double dans le fichier"
+        repetes = df[self.valides].duplicated(subset=colonnes, keep='first')
+        self.refuser(df, repetes.reindex(df.index, fill_value=False), colonne_rapport, message)
+
+        # Clés acceptées dans les lots précédents
+        vues = self.cles_vues.setdefault(tuple(colonnes), set())
+        cles = pd.Series(list(zip(*(df[colonne] for colonne in colonnes))), index=df.index, dtype=object)
+        self.refuser(df, cles.map(vues.__contains__).astype(bool), colonne_rapport, message)
+        vues.update(cles[self.valides])
+
+    @staticmethod
+    def dates(colonne):
+        """Dates ISO (AAAA-MM-JJ) ou françaises (JJ/MM/AAAA) ; NaT si invalide"""
+        dates = pd.to_datetime(colonne, errors='coerce', format='ISO8601')
+        restantes = dates.isna() & (colonne != '')
+        if restantes.any():
+            dates[restantes] = pd.to_datetime(colonne[restantes], errors='coerce', format='%d/%m/%Y')
+        return dates
+
+    @staticmethod
+    def entiers(colonne):
+        """Identifiants entiers ; NaN si vide ou non entier"""
+        nombres = pd.to_numeric(colonne, errors='coerce')
+        return nombres.where(nombres == nombres.round())
+
+    # --- À définir par les sous-classes ---
+
+    @abstractmethod
+    def valider(self, df):
+        """Vérifie les colonnes de `df` avec les outils ci-dessus (les lignes refusées sortent
+        de `self.valides`) et remplace les colonnes vérifiées par leurs valeurs converties"""
+
+    @abstractmethod
+    def requete_existants(self, df):
+        """QuerySet des enregistrements pouvant correspondre aux lignes valides `df` (une requête)"""
+
+    @abstractmethod
+    def construire(self, ligne):
+        """Instance non enregistrée du modèle pour une ligne validée (namedtuple de `df`)"""
+
+    def preparer(self):
+        """Charge une fois, avant le premier lot, les données de référence du compte"""
+
+    def modifier(self, objet):
+        """Objet construit pour une ligne existante, avant bulk_update (champs de suivi calculés par la base)"""
+        return objet
+
+    def apres_ecriture(self, nouveaux, modifies):
+        """Appelé dans la transaction d'un lot, après bulk_create / bulk_update (qui n'envoient pas de signaux)"""
+        ajuster(self.compte.pk, **{self.compteur: len(nouveaux)})
+
+    # --- Comparaison avec la base ---
+
+    def existants(self, df):
+        """Enregistrements existants pour les lignes `df`, une ligne par clé, valeurs comparables au fichier"""
+        lignes = self.requete_existants(df).values_list('id', 'compte_id', *self.cle, *self.champs)
+        existants = pd.DataFrame.from_records(
+            list(lignes), columns=['id', 'compte_id'] + self.cle + self.champs
+        )
+        return existants.drop_duplicates(subset=self.cle)
+
+    def differences(self, fichier, base):
+        """Tableau booléen ligne × champ : True là où la valeur du fichier diffère de la base"""
+        differences = pd.DataFrame(False, index=fichier.index, columns=self.champs)
+        for champ in self.champs:
+            a, b = fichier[champ], base[champ]
+            differences[champ] = ~((a == b) | (a.isna() & b.isna()))
+        return differences
+
+    # --- Déroulement ---
+
+    def importer_lot(self, df):
+        self.rapport.nb_lignes += len(df)
+        if df.empty:
+            return
+
+        # Les colonnes validées sont remplacées par leurs valeurs converties (dates, nombres...)
+        df = df.reindex(columns=self.colonnes, fill_value='')
+        self.valides = pd.Series(True, index=df.index)
+        self.valider(df)
+
+        # Rapprochement avec la base sur la clé, en une requête
+        existants = self.existants(df[self.valides])
+        base = df[self.cle].merge(existants, on=self.cle, how='left').set_index(df.index)
+        trouves = base['id'].notna() & self.valides
+
+        if self.mode == 'ajout':
+            self.rapport.nb_ignores += int(trouves.sum())
+        else:
+            autre_compte = trouves & (base['compte_id'] != self.compte.id)
+            self.refuser(df, autre_compte, self.cle[0], "Déjà utilisé par un autre compte")
+            trouves &= self.valides
+
+        a_creer = df[self.valides & ~trouves]
+        a_modifier = pd.Series(False, index=df.index)
+        champs_modifies = []
+        if self.mode != 'ajout' and trouves.any():
+            differences = self.differences(df[trouves], base[trouves])
+            lignes_modifiees = differences.any(axis=1)
+            a_modifier[lignes_modifiees[lignes_modifiees].index] = True
+            champs_modifies = [champ for champ in self.champs if differences[champ].any()] + self.champs_suivi
+            self.rapport.nb_inchanges += int((~lignes_modifiees).sum())
+
+        self.rapport.nb_importes += len(a_creer)
+        self.rapport.nb_modifies += int(a_modifier.sum())
+        if self.mode == 'simulation':
+            return
+
+        nouveaux = [self.construire(ligne) for ligne in a_creer.itertuples(index=False)]
+        modifies = []
+        for ligne, pk in zip(df[a_modifier].itertuples(index=False), base.loc[a_modifier, 'id']):
+            objet = self.construire(ligne)
+            objet.pk = int(pk)
+            modifies.append(self.modifier(objet))
+
+        with transaction.atomic():
+            self.modele.objects.bulk_create(nouveaux, batch_size=TAILLE_LOT)
+            if modifies:
+                self.modele.objects.bulk_update(modifies, champs_modifies, batch_size=TAILLE_LOT)
+            self.apres_ecriture(nouveaux, modifies)
+
+    def importer(self, lots):
+        """Importe les lots lus par `lire_par_lots` et renvoie le RapportImport.
+
+        Chaque lot est validé et écrit (dans sa propre transaction) avant la lecture
+        du suivant. Les clés acceptées sont retenues d'un lot à l'autre : une clé
+        répétée est refusée comme doublon du fichier, quel que soit son lot.
+        """
+        self.rapport = RapportImport(self.mode)
+        self.cles_vues = {}
+        for numero, df in enumerate(lots):
+            if numero == 0:
+                self.verifier_colonnes(df)
+                self.preparer()
+            self.importer_lot(df)
+        self.rapport.erreurs.sort(key=lambda erreur: erreur['ligne'])
+        return self.rapport
+
+
+class ImportateurEtudiants(Importateur):
+    modele = Etudiant
+    compteur = 'nb_etudiants'
+    libelle = "Étudiants"
+    colonnes = [
+        'numero_etudiant', 'nom', 'prenom', 'date_naissance', 'sexe',
+        'adresse', 'telephone', 'email', 'classe_id'
+    ]
+    cle = ['numero_etudiant']
+    champs = ['nom', 'prenom', 'date_naissance', 'sexe', 'adresse', 'telephone', 'email', 'classe_id']
+
+    def preparer(self):
+        self.classes_compte = set(Classe.objects.filter(compte=self.compte).values_list('id', flat=True))
+
+    def valider(self, df):
+        self.exiger(df, 'numero_etudiant', 20)
+        self.exiger(df, 'nom', 100)
+        self.exiger(df, 'prenom', 100)
+
+        df['sexe'] = df['sexe'].str.upper()
+        self.refuser(df, ~df['sexe'].isin([code for code, _ in Etudiant.SEXE_CHOICES]), 'sexe', "Valeur attendue : M ou F")
+
+        dates = self.dates(df['date_naissance'])
+        self.refuser(df, dates.isna(), 'date_naissance', "Date invalide (AAAA-MM-JJ ou JJ/MM/AAAA)")
+        df['date_naissance'] = dates.dt.date
+
+        self.limiter(df, 'telephone', 15)
+        self.refuser(df, (df['email'] != '') & ~df['email'].str.match(MOTIF_EMAIL), 'email', "Adresse email invalide")
+
+        classe_ids = self.entiers(df['classe_id'])
+        self.refuser(df, ~classe_ids.isin(self.classes_compte), 'classe_id', "Classe inconnue pour ce compte")
+        df['classe_id'] = classe_ids
+
+        self.doublons_fichier(df, ['numero_etudiant'], "Numéro étudiant")
+
+    def apres_ecriture(self, nouveaux, modifies):
+        # Les étudiants importés sont actifs (colonne absente du fichier)
+        super().apres_ecriture(nouveaux, modifies)
+        indexer_etudiants(nouveaux + modifies)
+        statistiques.invalider(self.compte.pk)
+
+    def requete_existants(self, df):
+        # Le numéro étudiant est unique sur toute la base
+        return Etudiant.objects.filter(numero_etudiant__in=df['numero_etudiant'].tolist())
+
+    def construire(self, ligne):
+        return Etudiant(
+            numero_etudiant=ligne.numero_etudiant,
+            nom=ligne.nom,
+            prenom=ligne.prenom,
+            date_naissance=ligne.date_naissance,
+            sexe=ligne.sexe,
+            adresse=ligne.adresse,
+            telephone=ligne.telephone,
+            email=ligne.email,
+            classe_id=int(ligne.classe_id),
+            compte=self.compte,
+        )
+
+
+class ImportateurClasses(Importateur):
+    modele = Classe
+    compteur = 'nb_classes'
+    libelle = "Classes"
+    colonnes = ['nom', 'niveau', 'annee_scolaire']
+    # Toutes les colonnes forment la clé : une classe existante est toujours inchangée
+    cle = ['nom', 'niveau', 'annee_scolaire']
+    champs = []
+
+    def apres_ecriture(self, nouveaux, modifies):
+        super().apres_ecriture(nouveaux, modifies)
+        references.invalider(self.compte.pk)
+
+    def valider(self, df):
+        self.exiger(df, 'nom', 50)
+        self.exiger(df, 'niveau', 20)
+        self.exiger(df, 'annee_scolaire', 9)
+        self.doublons_fichier(df, self.colonnes, "Classe")
+
+    def requete_existants(self, df):
+        return Classe.objects.filter(compte=self.compte, nom__in=df['nom'].unique().tolist())
+
+    def construire(self, ligne):
+        return Classe(
+            nom=ligne.nom,
+            niveau=ligne.niveau,
+            annee_scolaire=ligne.annee_scolaire,
+            compte=self.compte,
+        )
+
+
+class ImportateurMatieres(Importateur):
+    modele = Matiere
+    compteur = 'nb_matieres'
+    libelle = "Matières"
+    colonnes = ['nom', 'code', 'coefficient', 'description', 'enseignant_id', 'actif']
+    cle = ['code']
+    champs = ['nom', 'coefficient', 'description', 'enseignant_id', 'actif']
+
+    def preparer(self):
+        self.enseignants = set(ProfilUtilisateur.objects.filter(compte=self.compte).values_list('user_id', flat=True))
+
+    def valider(self, df):
+        self.exiger(df, 'nom', 100)
+        self.exiger(df, 'code', 10)
+
+        coefficients = pd.to_numeric(df['coefficient'].str.replace(',', '.'), errors='coerce')
+        self.refuser(df, ~coefficients.between(0.5, 10.0), 'coefficient', "Coefficient entre 0.5 et 10 attendu")
+        df['coefficient'] = coefficients.round(1)
+
+        # Enseignant facultatif, mais doit appartenir au compte
+        enseignant_ids = self.entiers(df['enseignant_id'])
+        self.refuser(df, (df['enseignant_id'] != '') & ~enseignant_ids.isin(self.enseignants), 'enseignant_id', "Enseignant inconnu pour ce compte")
+        df['enseignant_id'] = enseignant_ids
+
+        df['actif'] = df['actif'].str.lower().isin(['true', '1'])
+
+        self.doublons_fichier(df, ['code'], "Code matière")
+
+    def apres_ecriture(self, nouveaux, modifies):
+        # La colonne `actif` peut activer ou désactiver des matières existantes :
+        # le compteur est recompté (peu de matières par compte)
+        recompter(self.compte.pk, self.compteur)
+        references.invalider(self.compte.pk)
+        statistiques.invalider(self.compte.pk)
+
+    def requete_existants(self, df):
+        return Matiere.objects.filter(code__in=df['code'].tolist())
+
+    def existants(self, df):
+        existants = super().existants(df)
+        existants['coefficient'] = existants['coefficient'].astype(float)
+        return existants
+
+    def construire(self, ligne):
+        return Matiere(
+            nom=ligne.nom,
+            code=ligne.code,
+            coefficient=ligne.coefficient,
+            description=ligne.description,
+            enseignant_id=int(ligne.enseignant_id) if pd.notna(ligne.enseignant_id) else None,
+            compte=self.compte,
+            actif=ligne.actif,
+        )
+
+
+class ImportateurNotes(Importateur):
+    modele = Note
+    compteur = 'nb_notes'
+    libelle = "Notes"
+    colonnes = [
+        'numero_etudiant', 'code_matiere', 'note', 'note_sur', 'type_evaluation',
+        'date_evaluation', 'semestre', 'commentaire'
+    ]
+    facultatives = ['note_sur', 'type_evaluation', 'commentaire']
+    # Contrainte unique_together de Note
+    cle = ['etudiant_id', 'matiere_id', 'type_evaluation', 'date_evaluation']
+    champs = ['note', 'note_sur', 'semestre', 'commentaire']
+    champs_suivi = ['modifie_par', 'version']
+
+    # Type d'évaluation : code (DS, EX...) ou libellé (Examen, Oral...)
+    TYPES_EVALUATION = {
+        **{code: code for code, _ in Note.TYPE_EVALUATION_CHOICES},
+        **{libelle.upper(): code for code, libelle in Note.TYPE_EVALUATION_CHOICES},
+    }
+
+    def preparer(self):
+        # Dictionnaires de correspondance, une requête chacun
+        self.etudiants = dict(Etudiant.objects.filter(compte=self.compte).values_list('numero_etudiant', 'id'))
+        self.matieres = dict(Matiere.objects.filter(compte=self.compte).values_list('code', 'id'))
+
+    def modifier(self, objet):
+        objet.version = F('version') + 1
+        return objet
+
+    def apres_ecriture(self, nouveaux, modifies):
+        super().apres_ecriture(nouveaux, modifies)
+        statistiques.invalider(self.compte.pk)
+
+    @staticmethod
+    def decimaux(colonne):
+        return pd.to_numeric(colonne.str.replace(',', '.'), errors='coerce')
+
+    def valider(self, df):
+        df['etudiant_id'] = df['numero_etudiant'].map(self.etudiants).astype('Int64')
+        self.refuser(df, df['etudiant_id'].isna(), 'numero_etudiant', "Étudiant inconnu pour ce compte")
+        df['matiere_id'] = df['code_matiere'].map(self.matieres).astype('Int64')
+        self.refuser(df, df['matiere_id'].isna(), 'code_matiere', "Matière inconnue pour ce compte")
+
+        note_sur = self.decimaux(df['note_sur'].replace('', '20'))
+        self.refuser(df, ~((note_sur > 0) & (note_sur < 100)), 'note_sur', "Barème entre 0 et 100 attendu")
+        notes = self.decimaux(df['note'])
+        self.refuser(df, notes.isna(), 'note', "Note numérique attendue")
+        self.refuser(df, ~notes.between(0, 20), 'note', "Note entre 0 et 20 attendue")
+        self.refuser(df, notes > note_sur, 'note', "Note supérieure au barème (note_sur)")
+        df['note'] = notes.round(2)
+        df['note_sur'] = note_sur.round(2)
+
+        types = df['type_evaluation'].str.upper().replace('', 'DS').map(self.TYPES_EVALUATION)
+        self.refuser(df, types.isna(), 'type_evaluation', "Type inconnu (DS, CC, EX, TP ou OR)")
+        df['type_evaluation'] = types
+
+        dates = self.dates(df['date_evaluation'])
+        self.refuser(df, dates.isna(), 'date_evaluation', "Date invalide (AAAA-MM-JJ ou JJ/MM/AAAA)")
+        df['date_evaluation'] = dates.dt.date
+
+        df['semestre'] = df['semestre'].str.upper()
+        self.exiger(df, 'semestre', 2)
+
+        self.doublons_fichier(df, self.cle, "Note (même étudiant, matière, type et date)", 'numero_etudiant')
+
+    def requete_existants(self, df):
+        return Note.objects.filter(
+            etudiant_id__in=df['etudiant_id'].unique().tolist(),
+            matiere_id__in=df['matiere_id'].unique().tolist(),
+            date_evaluation__in=df['date_evaluation'].unique().tolist(),
+        )
+
+    def existants(self, df):
+        existants = super().existants(df)
+        existants['note'] = existants['note'].astype(float)
+        existants['note_sur'] = existants['note_sur'].astype(float)
+        return existants
+
+    def construire(self, ligne):
+        return Note(
+            etudiant_id=int(ligne.etudiant_id),
+            matiere_id=int(ligne.matiere_id),
+            compte=self.compte,
+            note=ligne.note,
+            note_sur=ligne.note_sur,
+            type_evaluation=ligne.type_evaluation,
+            date_evaluation=ligne.date_evaluation,
+            semestre=ligne.semestre,
+            commentaire=ligne.commentaire,
+            modifie_par=self.user,
+        )
+
+
+IMPORTATEURS = {
+    'etudiants': ImportateurEtudiants,
+    'classe': ImportateurClasses,
+    'matieres': ImportateurMatieres,
+    'notes': ImportateurNotes,
+}
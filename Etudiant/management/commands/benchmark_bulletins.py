@@ -0,0 +1,120 @@
+import time
+from io import BytesIO
+
+from django.core.management.base import BaseCommand
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.platypus import SimpleDocTemplate, Spacer
+
+from Etudiant.bulletins_pdf import (
+    GabaritBulletin, gabarit, generer_bulletin_etudiant_pdf, generer_bulletins_groupe_pdf,
+    generer_contenu_bulletin,
+)
+
+
+def donnees_fictives(nb_etudiants, nb_matieres):
+    """Bulletins synthétiques, sans accès à la base"""
+    bulletins = []
+    for i in range(nb_etudiants):
+        notes = [
+            {
+                'matiere_nom': f"Matière {m}",
+                'matiere_code': f"M{m:02d}",
+                'note': f"{(i * 7 + m * 3) % 20}.50",
+                'note_sur': "20.00",
+                'note_sur_vingt': ((i * 7 + m * 3) % 20) + 0.5,
+                'type_libelle': "Examen",
+                'coefficient': 1.0 + m % 3,
+            }
+            for m in range(nb_matieres)
+        ]
+        bulletins.append({
+            'compte_id': 0,
+            'etudiant_id': i,
+            'nom_complet': f"Étudiant {i}",
+            'numero_etudiant': f"E{i:05d}",
+            'classe': "Classe de test",
+            'semestre': "S1",
+            'annee_scolaire': "2025-2026",
+            'notes': notes,
+            'moyenne': 12.5,
+            'rang': i + 1,
+            'effectif': nb_etudiants,
+            'appreciation': "Assez bien - Peut mieux faire",
+            'date_generation': "01/01/2026",
+            'nom_fichier': f"bulletin_{i}.pdf",
+        })
+    return bulletins
+
+
+# ================= ANCIENNE MISE EN PAGE (RÉFÉRENCE) =================
+# Reproduit le fonctionnement précédent : styles recréés pour chaque étudiant,
+# SimpleDocTemplate et saut de page simulé par un Spacer de 20 cm.
+
+def _groupe_avant(bulletins):
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=1*cm, bottomMargin=1*cm)
+    story = []
+    for i, donnees in enumerate(bulletins):
+        if i > 0:
+            story.append(Spacer(1, 20*cm))
+        story.extend(generer_contenu_bulletin(donnees, GabaritBulletin()))
+    doc.build(story)
+    return doc.page
+
+
+def _individuels_avant(bulletins):
+    for donnees in bulletins:
+        doc = SimpleDocTemplate(BytesIO(), pagesize=A4, topMargin=1*cm, bottomMargin=1*cm)
+        doc.build(generer_contenu_bulletin(donnees, GabaritBulletin()))
+    return len(bulletins)
+
+
+# ================= MISE EN PAGE ACTUELLE =================
+
+def _groupe_apres(bulletins):
+    return generer_bulletins_groupe_pdf(bulletins, BytesIO())
+
+
+def _individuels_apres(bulletins):
+    for donnees in bulletins:
+        generer_bulletin_etudiant_pdf(donnees)
+    return len(bulletins)
+
+
+class Command(BaseCommand):
+    help = "Mesure le débit (pages/seconde) du rendu des bulletins PDF, avant et après le gabarit partagé"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--etudiants', type=int, default=200, help="Nombre de bulletins (défaut : 200)")
+        parser.add_argument('--matieres', type=int, default=8, help="Matières par bulletin (défaut : 8)")
+        parser.add_argument('--repetitions', type=int, default=3, help="Mesures par cas, la meilleure est retenue (défaut : 3)")
+
+    def mesurer(self, fonction, bulletins, repetitions):
+        meilleur = None
+        pages = 0
+        for _ in range(repetitions):
+            debut = time.perf_counter()
+            pages = fonction(bulletins)
+            duree = time.perf_counter() - debut
+            meilleur = duree if meilleur is None else min(meilleur, duree)
+        return pages, meilleur
+
+    def handle(self, *args, **options):
+        bulletins = donnees_fictives(options['etudiants'], options['matieres'])
+        gabarit()  # Construit une fois, hors mesure, comme dans un worker déjà démarré
+
+        cas = [
+            ("PDF groupé", _groupe_avant, _groupe_apres),
+            ("PDF individuels", _individuels_avant, _individuels_apres),
+        ]
+        self.stdout.write(f"{len(bulletins)} bulletins, {options['matieres']} matières")
+        for libelle, avant, apres in cas:
+            for version, fonction in (("avant", avant), ("après", apres)):
+                pages, duree = self.mesurer(fonction, bulletins, options['repetitions'])
+                # Le Spacer de l'ancienne version produit des pages en trop : on affiche aussi
+                # le débit en bulletins, seul comparable d'une version à l'autre
+                self.stdout.write(
+                    f"{libelle:<16} {version:<6} {pages:>6} pages  {duree:7.2f} s  "
+                    f"{pages / duree:8.1f} pages/s  {len(bulletins) / duree:8.1f} bulletins/s"
+                )
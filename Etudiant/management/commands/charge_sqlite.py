@@ -0,0 +1,198 @@
+import copy
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections, transaction
+
+
+ALIAS = 'charge_sqlite'
+
+
+def _configuration(chemin, profil):
+    """Copie de la base 'default' sur un fichier jetable, avec ou sans le profil de production"""
+    configuration = copy.deepcopy(connections.settings['default'])
+    configuration['NAME'] = chemin
+    configuration['CONN_MAX_AGE'] = 0
+    if profil:
+        # Profil complet, WAL compris, même si DEBUG l'écarte de la base de développement
+        configuration['PRAGMAS'] = settings.SQLITE_PRAGMAS_PRODUCTION
+    else:
+        # Réglages par défaut de Django : BEGIN différé, journal DELETE, aucun pragma
+        configuration['OPTIONS'] = {
+            cle: valeur for cle, valeur in configuration['OPTIONS'].items() if cle != 'transaction_mode'
+        }
+        configuration['PRAGMAS'] = {}
+    return configuration
+
+
+def _resultat():
+    return {'transactions': 0, 'lectures': 0, 'verrous': 0, 'latences': []}
+
+
+def _ecrivain(numero, fin, lignes, travail):
+    """Transactions lecture puis écriture, comme une saisie de notes : SELECT, traitement, UPDATE + INSERT"""
+    connexion = connections[ALIAS]
+    hasard = random.Random(numero)
+    resultat = _resultat()
+    try:
+        while time.monotonic() < fin:
+            ligne = hasard.randint(1, lignes)
+            debut = time.perf_counter()
+            try:
+                with transaction.atomic(using=ALIAS):
+                    with connexion.cursor() as curseur:
+                        curseur.execute('SELECT valeur FROM charge_compteur WHERE id = %s', [ligne])
+                        valeur = curseur.fetchone()[0] + 1
+                        time.sleep(travail)
+                        curseur.execute('UPDATE charge_compteur SET valeur = %s WHERE id = %s', [valeur, ligne])
+                        curseur.execute(
+                            'INSERT INTO charge_journal (compteur_id, valeur) VALUES (%s, %s)', [ligne, valeur]
+                        )
+            except OperationalError as erreur:
+                if 'locked' not in str(erreur):
+                    raise
+                resultat['verrous'] += 1
+                continue
+            resultat['transactions'] += 1
+            resultat['latences'].append(time.perf_counter() - debut)
+    finally:
+        connexion.close()
+    return resultat
+
+
+def _lecteur(fin):
+    """Lectures courtes pendant les écritures, comme l'affichage des listes"""
+    connexion = connections[ALIAS]
+    resultat = _resultat()
+    try:
+        while time.monotonic() < fin:
+            try:
+                with connexion.cursor() as curseur:
+                    curseur.execute('SELECT SUM(valeur) FROM charge_compteur')
+                    curseur.fetchone()
+                    curseur.execute('SELECT id, valeur FROM charge_journal ORDER BY id DESC LIMIT 20')
+                    curseur.fetchall()
+            except OperationalError as erreur:
+                if 'locked' not in str(erreur):
+                    raise
+                resultat['verrous'] += 1
+                continue
+            resultat['lectures'] += 1
+    finally:
+        connexion.close()
+    return resultat
+
+
+class Command(BaseCommand):
+    help = (
+        "Test de charge SQLite : écrivains et lecteurs concurrents sur une base jetable, "
+        "avec les réglages par défaut de Django puis avec le profil de production"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ecrivains', type=int, default=8, help="Threads qui écrivent (défaut : 8)")
+        parser.add_argument('--lecteurs', type=int, default=4, help="Threads qui lisent (défaut : 4)")
+        parser.add_argument('--duree', type=float, default=5, help="Durée de chaque mesure en secondes (défaut : 5)")
+        parser.add_argument('--travail', type=float, default=2,
+                            help="Traitement simulé entre lecture et écriture, en millisecondes (défaut : 2)")
+        parser.add_argument('--lignes', type=int, default=50, help="Lignes mises à jour (défaut : 50)")
+
+    def preparer(self, lignes):
+        with connections[ALIAS].cursor() as curseur:
+            curseur.execute('CREATE TABLE charge_compteur (id INTEGER PRIMARY KEY, valeur INTEGER NOT NULL)')
+            curseur.execute(
+                'CREATE TABLE charge_journal (id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'compteur_id INTEGER NOT NULL, valeur INTEGER NOT NULL)'
+            )
+            curseur.executemany(
+                'INSERT INTO charge_compteur (id, valeur) VALUES (%s, 0)', [(i,) for i in range(1, lignes + 1)]
+            )
+            curseur.execute('PRAGMA journal_mode')
+            return curseur.fetchone()[0]
+
+    def verifier(self):
+        """Chaque transaction validée a bien été écrite une fois : la somme des compteurs = taille du journal"""
+        with connections[ALIAS].cursor() as curseur:
+            curseur.execute('SELECT SUM(valeur) FROM charge_compteur')
+            somme = curseur.fetchone()[0]
+            curseur.execute('SELECT COUNT(*) FROM charge_journal')
+            journal = curseur.fetchone()[0]
+        return somme, journal
+
+    def mesurer(self, profil, options):
+        dossier = tempfile.mkdtemp(prefix='charge_sqlite_')
+        chemin = os.path.join(dossier, 'charge.sqlite3')
+        connections.settings[ALIAS] = _configuration(chemin, profil)
+        try:
+            journal_mode = self.preparer(options['lignes'])
+            connections[ALIAS].close()
+
+            fin = time.monotonic() + options['duree']
+            travail = options['travail'] / 1000
+            with ThreadPoolExecutor(max_workers=options['ecrivains'] + options['lecteurs']) as executeur:
+                taches = [
+                    executeur.submit(_ecrivain, i, fin, options['lignes'], travail)
+                    for i in range(options['ecrivains'])
+                ] + [
+                    executeur.submit(_lecteur, fin) for _ in range(options['lecteurs'])
+                ]
+                resultats = [tache.result() for tache in taches]
+            ecritures = resultats[:options['ecrivains']]
+            lectures = resultats[options['ecrivains']:]
+
+            somme, journal = self.verifier()
+        finally:
+            connections[ALIAS].close()
+            del connections[ALIAS]
+            del connections.settings[ALIAS]
+            for fichier in os.listdir(dossier):
+                os.remove(os.path.join(dossier, fichier))
+            os.rmdir(dossier)
+
+        transactions = sum(r['transactions'] for r in ecritures)
+        latences = sorted(latence for r in ecritures for latence in r['latences'])
+        if len(latences) >= 2:
+            centiles = statistics.quantiles(latences, n=100)
+            p50, p95 = centiles[49], centiles[94]
+        else:
+            p50 = p95 = latences[0] if latences else 0
+        return {
+            'journal_mode': journal_mode,
+            'transactions': transactions,
+            'debit': transactions / options['duree'],
+            'verrous_ecriture': sum(r['verrous'] for r in ecritures),
+            'lectures': sum(r['lectures'] for r in lectures),
+            'verrous_lecture': sum(r['verrous'] for r in lectures),
+            'p50': p50 * 1000,
+            'p95': p95 * 1000,
+            'max': (latences[-1] if latences else 0) * 1000,
+            'coherent': somme == journal == transactions,
+        }
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError("Ce test de charge ne concerne que SQLite.")
+
+        self.stdout.write(
+            f"{options['ecrivains']} écrivains, {options['lecteurs']} lecteurs, {options['duree']:g} s par mesure, "
+            f"{options['travail']:g} ms de traitement par transaction"
+        )
+        self.stdout.write(
+            f"{'profil':<12} {'journal':<8} {'validées':>9} {'tx/s':>8} {'verrous':>8} "
+            f"{'lectures':>9} {'verrous':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}  cohérence"
+        )
+        for libelle, profil in (("défaut", False), ("production", True)):
+            r = self.mesurer(profil, options)
+            ligne = (
+                f"{libelle:<12} {r['journal_mode']:<8} {r['transactions']:>9} {r['debit']:>8.1f} "
+                f"{r['verrous_ecriture']:>8} {r['lectures']:>9} {r['verrous_lecture']:>8} "
+                f"{r['p50']:>8.1f} {r['p95']:>8.1f} {r['max']:>8.1f}  {'oui' if r['coherent'] else 'NON'}"
+            )
+            sans_erreur = r['coherent'] and not r['verrous_ecriture'] and not r['verrous_lecture']
+            self.stdout.write(self.style.SUCCESS(ligne) if sans_erreur else self.style.WARNING(ligne))
@@ -0,0 +1,59 @@
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from Etudiant.replique import alias_replique
+
+
+def copier(source, destination):
+    """Copie cohérente de la base source dans la réplique par l'API de sauvegarde SQLite.
+
+    La copie est écrite en une transaction dans le fichier de la réplique : les
+    connexions déjà ouvertes dessus voient l'ancienne version jusqu'à la fin de leur
+    lecture en cours, puis la nouvelle, sans être fermées.
+    """
+    with closing(sqlite3.connect(source)) as origine, closing(sqlite3.connect(destination, timeout=30)) as copie:
+        origine.backup(copie)
+        # Réplique en WAL : ses lecteurs ne bloquent pas la copie suivante
+        copie.execute('PRAGMA journal_mode = WAL')
+        copie.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+class Command(BaseCommand):
+    help = "Copie la base principale dans la réplique de lecture des rapports (une fois, ou périodiquement)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=0,
+            help="Recopie toutes les N secondes au lieu de s'arrêter après une copie",
+        )
+
+    def chemin(self, alias):
+        connexion = connections[alias]
+        if connexion.vendor != 'sqlite' or connexion.is_in_memory_db():
+            raise CommandError(f"La base '{alias}' n'est pas un fichier SQLite : copie impossible.")
+        return str(connexion.settings_dict['NAME'])
+
+    def handle(self, *args, **options):
+        alias = alias_replique()
+        if alias is None:
+            raise CommandError("Aucune réplique configurée (REPLIQUE_LECTURE).")
+        source = self.chemin(DEFAULT_DB_ALIAS)
+        destination = self.chemin(alias)
+
+        while True:
+            debut = time.perf_counter()
+            copier(source, destination)
+            taille = os.path.getsize(destination) / (1024 * 1024)
+            self.stdout.write(self.style.SUCCESS(
+                f"Réplique '{alias}' copiée : {taille:.1f} Mo en {time.perf_counter() - debut:.2f} s."
+            ))
+            if not options['intervalle']:
+                break
+            time.sleep(options['intervalle'])
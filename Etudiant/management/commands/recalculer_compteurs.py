@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from Etudiant.compteurs import recalculer
+from utilisateurs.models import Compte
+
+
+class Command(BaseCommand):
+    help = "Recalcule par COUNT(*) les compteurs du tableau de bord de chaque compte (après des écritures hors de l'application)"
+
+    def handle(self, *args, **options):
+        nombre = 0
+        for compte_id in Compte.objects.values_list('id', flat=True).iterator():
+            recalculer(compte_id)
+            nombre += 1
+        self.stdout.write(self.style.SUCCESS(f"Compteurs recalculés pour {nombre} compte(s)."))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from Etudiant.recherche import disponible, reconstruire_index
+
+
+class Command(BaseCommand):
+    help = "Reconstruit l'index plein texte de recherche des étudiants (après des écritures hors de l'application)"
+
+    def handle(self, *args, **options):
+        if not disponible():
+            raise CommandError("L'index de recherche plein texte n'existe que sur SQLite.")
+
+        with transaction.atomic():
+            nombre = reconstruire_index()
+        self.stdout.write(self.style.SUCCESS(f"{nombre} étudiant(s) indexé(s)."))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from Etudiant.taches import entretenir, executer_tache, prendre_tache_suivante
+
+
+class Command(BaseCommand):
+    help = "Traite la file d'attente des générations de bulletins en arrière-plan"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--une-fois',
+            action='store_true',
+            help="Traite les tâches en attente puis s'arrête (au lieu de surveiller la file)",
+        )
+        parser.add_argument(
+            '--intervalle',
+            type=float,
+            default=2.0,
+            help="Secondes entre deux consultations de la file vide (défaut : 2)",
+        )
+        parser.add_argument(
+            '--entretien',
+            type=float,
+            default=300,
+            help="Secondes entre deux reprises des tâches abandonnées et purges des anciens fichiers (défaut : 300)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Worker de bulletins démarré.")
+        dernier_entretien = None
+        while True:
+            close_old_connections()
+            if dernier_entretien is None or time.monotonic() - dernier_entretien >= options['entretien']:
+                self.entretenir()
+                dernier_entretien = time.monotonic()
+            tache = prendre_tache_suivante()
+
+            if tache is None:
+                if options['une_fois']:
+                    break
+                time.sleep(options['intervalle'])
+                continue
+
+            self.stdout.write(f"Tâche {tache.pk} : {tache}")
+            if executer_tache(tache):
+                self.stdout.write(self.style.SUCCESS(f"Tâche {tache.pk} terminée."))
+            else:
+                tache.refresh_from_db()
+                if tache.statut == 'erreur':
+                    self.stdout.write(self.style.ERROR(f"Tâche {tache.pk} en erreur : {tache.erreur}"))
+                else:
+                    self.stdout.write(self.style.WARNING(f"Tâche {tache.pk} reprise par un autre worker."))
+
+    def entretenir(self):
+        reprises, echecs, supprimes = entretenir()
+        if reprises or echecs:
+            self.stdout.write(self.style.WARNING(
+                f"Tâches abandonnées : {reprises} remise(s) en file, {echecs} passée(s) en erreur."
+            ))
+        if supprimes:
+            self.stdout.write(f"{supprimes} ancien(s) fichier(s) supprimé(s).")
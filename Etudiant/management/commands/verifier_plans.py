@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from Etudiant.plans_requetes import verifier_plans
+
+
+class Command(BaseCommand):
+    help = "Vérifie avec EXPLAIN QUERY PLAN que les requêtes fréquentes utilisent un index (échoue sur un parcours complet)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--plans', action='store_true', help="Affiche le plan de chaque requête")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Cette vérification lit les plans SQLite (EXPLAIN QUERY PLAN).")
+
+        echecs = []
+        for libelle, plan, parcours in verifier_plans():
+            if parcours:
+                echecs.append(libelle)
+                self.stdout.write(self.style.ERROR(f"PARCOURS {libelle} : {', '.join(parcours)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"OK       {libelle}"))
+            if options['plans'] or parcours:
+                for ligne in plan.splitlines():
+                    self.stdout.write(f"           {ligne}")
+
+        if echecs:
+            raise CommandError(f"{len(echecs)} requête(s) sans index.")
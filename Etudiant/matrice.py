@@ -0,0 +1,149 @@
+# matrice.py
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .classement import Classement, moyennes_ponderees, notes_sur_vingt
+from .models import Etudiant, Note
+
+
+# Colonnes chargées depuis la base, renommées pour le DataFrame
+CHAMPS_NOTES = {
+    'id': 'id',
+    'etudiant_id': 'etudiant_id',
+    'matiere_id': 'matiere_id',
+    'matiere__nom': 'matiere_nom',
+    'matiere__code': 'matiere_code',
+    'matiere__coefficient': 'coefficient',
+    'note': 'note',
+    'note_sur': 'note_sur',
+    'type_evaluation': 'type_evaluation',
+    'date_evaluation': 'date_evaluation',
+}
+
+LIBELLES_EVALUATION = dict(Note.TYPE_EVALUATION_CHOICES)
+
+
+class MatriceNotesClasse:
+    """Notes d'une classe pour un semestre, chargées en une seule requête
+    et pivotées en tableau étudiants × matières.
+
+    Les moyennes reprennent la règle des bulletins : chaque note, ramenée sur 20,
+    est pondérée par le coefficient de sa matière.
+    """
+
+    def __init__(self, classe, semestre):
+        self.classe = classe
+        self.semestre = semestre
+
+        # Requête 1 : les étudiants actifs de la classe
+        self.etudiants = list(
+            Etudiant.objects.filter(classe=classe, actif=True)
+            .select_related('classe')
+            .order_by('nom', 'prenom')
+        )
+        ids_etudiants = [etudiant.id for etudiant in self.etudiants]
+
+        # Requête 2 : toutes les notes du semestre pour ces étudiants
+        lignes = Note.objects.filter(
+            etudiant__classe=classe,
+            etudiant__actif=True,
+            semestre=semestre,
+        ).order_by('matiere__nom', 'date_evaluation').values_list(*CHAMPS_NOTES)
+
+        notes = pd.DataFrame.from_records(list(lignes), columns=list(CHAMPS_NOTES.values()))
+        notes['coefficient'] = notes['coefficient'].astype(float)
+        notes['note_sur_vingt'] = notes_sur_vingt(notes['note'], notes['note_sur'])
+        notes['points'] = notes['note_sur_vingt'] * notes['coefficient']
+        notes['type_libelle'] = notes['type_evaluation'].map(LIBELLES_EVALUATION)
+        self.notes = notes
+
+        # Pivot étudiants × matières (points pondérés et somme des coefficients)
+        cellules = notes.groupby(['etudiant_id', 'matiere_id'])[['points', 'coefficient']].sum()
+        self.points = cellules['points'].unstack(fill_value=0.0).reindex(ids_etudiants, fill_value=0.0)
+        self.coefficients = cellules['coefficient'].unstack(fill_value=0.0).reindex(ids_etudiants, fill_value=0.0)
+
+        self.nb_notes = notes.groupby('etudiant_id').size().reindex(ids_etudiants, fill_value=0)
+
+        # Moyennes et classement de toute la classe en un passage sur les tableaux
+        index = pd.Index(ids_etudiants).get_indexer(notes['etudiant_id'])
+        moyennes = moyennes_ponderees(index, notes['note_sur_vingt'], notes['coefficient'], len(ids_etudiants))
+        self.moyennes = pd.Series(moyennes, index=ids_etudiants, name='moyenne')
+        self.classement = Classement(ids_etudiants, moyennes)
+
+        self._notes_par_etudiant = {
+            etudiant_id: groupe.to_dict('records')
+            for etudiant_id, groupe in notes.groupby('etudiant_id', sort=False)
+        }
+
+    def __len__(self):
+        return len(self.etudiants)
+
+    def notes_etudiant(self, etudiant_id):
+        """Liste des notes d'un étudiant (dictionnaires), triées par matière puis date"""
+        return self._notes_par_etudiant.get(etudiant_id, [])
+
+    def moyenne(self, etudiant_id):
+        """Moyenne générale pondérée d'un étudiant, None s'il n'a aucune note"""
+        moyenne = self.moyennes.get(etudiant_id)
+        if moyenne is None or np.isnan(moyenne):
+            return None
+        return float(moyenne)
+
+    def donnees_bulletin(self, etudiant, annee_scolaire, date_generation=None):
+        """Données d'un bulletin en types simples (sans objet ORM), prêtes pour le rendu"""
+        resultat = self.classement.resultat(etudiant.id)
+        nom_fichier = f"bulletin_{etudiant.nom}_{etudiant.prenom}_{self.semestre}_{annee_scolaire}.pdf"
+        return {
+            'compte_id': self.classe.compte_id,
+            'etudiant_id': etudiant.id,
+            'nom_complet': etudiant.nom_complet,
+            'numero_etudiant': etudiant.numero_etudiant,
+            'classe': str(self.classe),
+            'semestre': self.semestre,
+            'annee_scolaire': annee_scolaire,
+            'notes': [
+                {
+                    'matiere_nom': note['matiere_nom'],
+                    'matiere_code': note['matiere_code'],
+                    'note': str(note['note']),
+                    'note_sur': str(note['note_sur']),
+                    'note_sur_vingt': float(note['note_sur_vingt']),
+                    'type_libelle': note['type_libelle'],
+                    'coefficient': float(note['coefficient']),
+                }
+                for note in self.notes_etudiant(etudiant.id)
+            ],
+            'moyenne': resultat['moyenne'],
+            'rang': resultat['rang'],
+            'effectif': resultat['effectif'],
+            'appreciation': resultat['appreciation'],
+            'date_generation': date_generation or datetime.now().strftime("%d/%m/%Y"),
+            'nom_fichier': nom_fichier.replace(' ', '_').replace('/', '-'),
+        }
+
+    def donnees_bulletins(self, annee_scolaire):
+        """Données des bulletins de tous les étudiants de la classe"""
+        date_generation = datetime.now().strftime("%d/%m/%Y")
+        return [self.donnees_bulletin(etudiant, annee_scolaire, date_generation) for etudiant in self.etudiants]
+
+    @property
+    def moyennes_matieres(self):
+        """Moyenne pondérée de chaque étudiant dans chaque matière (NaN si pas de note)"""
+        return self.points / self.coefficients.where(self.coefficients > 0)
+
+    @property
+    def stats_matieres(self):
+        """Statistiques de la classe par matière, sur les notes ramenées sur 20"""
+        if self.notes.empty:
+            return pd.DataFrame(columns=['matiere_nom', 'matiere_code', 'coefficient', 'nb_notes', 'moyenne', 'minimum', 'maximum'])
+        return self.notes.groupby('matiere_id').agg(
+            matiere_nom=('matiere_nom', 'first'),
+            matiere_code=('matiere_code', 'first'),
+            coefficient=('coefficient', 'first'),
+            nb_notes=('note_sur_vingt', 'size'),
+            moyenne=('note_sur_vingt', 'mean'),
+            minimum=('note_sur_vingt', 'min'),
+            maximum=('note_sur_vingt', 'max'),
+        ).sort_values('matiere_nom')
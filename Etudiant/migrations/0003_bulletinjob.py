@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:29
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Etudiant', '0002_bulletin_compte_classe_compte_etudiant_compte_and_more'),
+        ('utilisateurs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulletinJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('semestre', models.CharField(max_length=2, verbose_name='Semestre')),
+                ('annee_scolaire', models.CharField(max_length=9, verbose_name='Année scolaire')),
+                ('format_export', models.CharField(choices=[('pdf', 'PDF individuel'), ('pdf_groupe', 'PDF groupé'), ('excel', 'Excel')], max_length=10, verbose_name="Format d'export")),
+                ('statut', models.CharField(choices=[('attente', 'En attente'), ('en_cours', 'En cours'), ('termine', 'Terminée'), ('erreur', 'En erreur')], default='attente', max_length=10, verbose_name='Statut')),
+                ('progression', models.PositiveIntegerField(default=0, verbose_name='Bulletins générés')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Bulletins à générer')),
+                ('fichier', models.CharField(blank=True, max_length=255, verbose_name='Fichier généré')),
+                ('nom_fichier', models.CharField(blank=True, max_length=255, verbose_name='Nom du fichier')),
+                ('erreur', models.TextField(blank=True, verbose_name='Erreur')),
+                ('date_creation', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('date_debut', models.DateTimeField(blank=True, null=True, verbose_name='Début du traitement')),
+                ('date_fin', models.DateTimeField(blank=True, null=True, verbose_name='Fin du traitement')),
+                ('date_activite', models.DateTimeField(blank=True, help_text='Mis à jour par le worker pendant le traitement', null=True, verbose_name='Dernier signe de vie')),
+                ('tentatives', models.PositiveSmallIntegerField(default=0, verbose_name='Tentatives')),
+                ('classe', models.ForeignKey(blank=True, help_text='Vide : toutes les classes du compte', null=True, on_delete=django.db.models.deletion.CASCADE, to='Etudiant.classe', verbose_name='Classe')),
+                ('compte', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='utilisateurs.compte')),
+                ('cree_par', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Créée par')),
+            ],
+            options={
+                'verbose_name': 'Tâche de génération de bulletins',
+                'verbose_name_plural': 'Tâches de génération de bulletins',
+                'ordering': ['-date_creation'],
+                'indexes': [models.Index(fields=['statut', 'date_creation'], name='Etudiant_bu_statut_703b67_idx')],
+            },
+        ),
+    ]
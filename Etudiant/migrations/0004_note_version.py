@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 22:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Etudiant', '0003_bulletinjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='version',
+            field=models.BigIntegerField(default=1, editable=False, verbose_name='Version'),
+        ),
+    ]
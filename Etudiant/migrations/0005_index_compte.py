@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Etudiant', '0004_note_version'),
+        ('utilisateurs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bulletin',
+            index=models.Index(fields=['compte', 'semestre', 'annee_scolaire'], name='Etudiant_bu_compte__a046f8_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='classe',
+            index=models.Index(fields=['compte', 'niveau', 'nom'], name='Etudiant_cl_compte__4f0eca_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='etudiant',
+            index=models.Index(fields=['compte', 'classe'], name='Etudiant_et_compte__76d861_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matiere',
+            index=models.Index(fields=['compte', 'nom'], name='Etudiant_ma_compte__471927_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['compte', 'matiere', 'etudiant', 'semestre', 'note', 'note_sur'], name='Etudiant_no_compte__da8782_idx'),
+        ),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Etudiant', '0005_index_compte'),
+        ('utilisateurs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bulletin',
+            name='compte',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='utilisateurs.compte'),
+        ),
+        migrations.AlterField(
+            model_name='bulletin',
+            name='etudiant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='Etudiant.etudiant', verbose_name='Étudiant'),
+        ),
+        migrations.AlterField(
+            model_name='classe',
+            name='compte',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='utilisateurs.compte'),
+        ),
+        migrations.AlterField(
+            model_name='etudiant',
+            name='compte',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='utilisateurs.compte'),
+        ),
+        migrations.AlterField(
+            model_name='matiere',
+            name='compte',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='utilisateurs.compte'),
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='compte',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='utilisateurs.compte'),
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='etudiant',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='Etudiant.etudiant', verbose_name='Étudiant'),
+        ),
+        migrations.AlterField(
+            model_name='note',
+            name='matiere',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='Etudiant.matiere', verbose_name='Matière'),
+        ),
+        migrations.AddIndex(
+            model_name='etudiant',
+            index=models.Index(condition=models.Q(('actif', True)), fields=['compte', 'nom', 'prenom'], name='etudiant_actif_compte_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='etudiant',
+            index=models.Index(condition=models.Q(('actif', True)), fields=['classe', 'nom', 'prenom'], name='etudiant_actif_classe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['etudiant', 'semestre'], name='Etudiant_no_etudian_3282ee_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['compte', '-date_saisie'], name='Etudiant_no_compte__8fe28d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['compte', '-date_evaluation'], name='Etudiant_no_compte__770891_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['matiere', 'semestre'], name='Etudiant_no_matiere_e8ffec_idx'),
+        ),
+    ]
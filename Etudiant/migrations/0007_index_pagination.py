@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Etudiant', '0006_index_requetes'),
+        ('utilisateurs', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='etudiant',
+            name='etudiant_actif_compte_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='note',
+            name='Etudiant_no_compte__770891_idx',
+        ),
+        migrations.AddIndex(
+            model_name='etudiant',
+            index=models.Index(fields=['compte', 'nom', 'prenom', 'id'], name='Etudiant_et_compte__9ae23d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['compte', '-date_evaluation', '-id'], name='Etudiant_no_compte__5d3a23_idx'),
+        ),
+    ]
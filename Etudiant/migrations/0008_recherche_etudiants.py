@@ -0,0 +1,34 @@
+# Index plein texte des étudiants (SQLite FTS5), voir Etudiant/recherche.py
+
+from django.db import migrations
+
+
+def creer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    from Etudiant.recherche import reconstruire_index
+
+    schema_editor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS etudiant_recherche USING fts5(
+            nom, prenom, numero_etudiant,
+            tokenize = 'unicode61 remove_diacritics 2'
+        )
+    """)
+    reconstruire_index(apps.get_model('Etudiant', 'Etudiant'))
+
+
+def supprimer_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS etudiant_recherche")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Etudiant', '0007_index_pagination'),
+    ]
+
+    operations = [
+        migrations.RunPython(creer_index, supprimer_index),
+    ]
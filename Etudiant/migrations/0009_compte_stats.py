@@ -0,0 +1,34 @@
+# Generated by Django 5.2.4 on 2026-10-17 23:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Etudiant', '0008_recherche_etudiants'),
+        ('utilisateurs', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompteStats',
+            fields=[
+                ('compte', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='utilisateurs.compte')),
+                ('nb_etudiants', models.PositiveIntegerField(default=0, verbose_name='Étudiants actifs')),
+                ('nb_classes', models.PositiveIntegerField(default=0, verbose_name='Classes')),
+                ('nb_matieres', models.PositiveIntegerField(default=0, verbose_name='Matières actives')),
+                ('nb_notes', models.PositiveIntegerField(default=0, verbose_name='Notes')),
+                ('date_maj', models.DateTimeField(auto_now=True, verbose_name='Dernière mise à jour')),
+            ],
+            options={
+                'verbose_name': 'Statistiques du compte',
+                'verbose_name_plural': 'Statistiques des comptes',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='etudiant',
+            index=models.Index(fields=['compte', '-date_inscription'], name='Etudiant_et_compte__bbae0b_idx'),
+        ),
+    ]
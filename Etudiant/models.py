@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import F, Q
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.contrib.auth.models import User
+from utilisateurs.compte_actif import ManagerCompte
 from utilisateurs.models import Compte
 
 class Classe(models.Model):
@@ -9,12 +11,19 @@ class Classe(models.Model):
     niveau = models.CharField(max_length=20, verbose_name="Niveau", help_text="Ex: 1ère année, 2ème année")
     annee_scolaire = models.CharField(max_length=9, verbose_name="Année scolaire", help_text="Ex: 2024-2025")
     date_creation = models.DateTimeField(auto_now_add=True)
-    compte = models.ForeignKey(Compte, on_delete=models.CASCADE)
+    compte = models.ForeignKey(Compte, on_delete=models.CASCADE, db_index=False)  # couvert par un index composite
+
+    objects = models.Manager()
+    du_compte = ManagerCompte()  # limité au compte de la requête en cours
     
     class Meta:
         verbose_name = "Classe"
         verbose_name_plural = "Classes"
         ordering = ['niveau', 'nom']
+        indexes = [
+            # Classes d'un compte dans l'ordre d'affichage
+            models.Index(fields=['compte', 'niveau', 'nom']),
+        ]
     
     def __str__(self):
         return f"{self.nom} - {self.annee_scolaire}"
@@ -37,13 +46,27 @@ class Etudiant(models.Model):
     classe = models.ForeignKey(Classe, on_delete=models.CASCADE, verbose_name="Classe")
     date_inscription = models.DateTimeField(auto_now_add=True, verbose_name="Date d'inscription")
     actif = models.BooleanField(default=True, verbose_name="Étudiant actif")
-    compte = models.ForeignKey(Compte, on_delete=models.CASCADE)
-    
+    compte = models.ForeignKey(Compte, on_delete=models.CASCADE, db_index=False)  # couvert par un index composite
+
+    objects = models.Manager()
+    du_compte = ManagerCompte()  # limité au compte de la requête en cours
     
     class Meta:
         verbose_name = "Étudiant"
         verbose_name_plural = "Étudiants"
         ordering = ['nom', 'prenom']
+        indexes = [
+            # Étudiants d'une classe d'un compte
+            models.Index(fields=['compte', 'classe']),
+            # Liste des étudiants d'un compte dans l'ordre de pagination (nom, prénom, id)
+            models.Index(fields=['compte', 'nom', 'prenom', 'id']),
+            # Derniers inscrits (tableau de bord)
+            models.Index(fields=['compte', '-date_inscription']),
+            # Étudiants actifs d'une classe, dans l'ordre d'affichage.
+            # Index partiel : Django écrit le filtre actif=True sous la forme `WHERE "actif"`,
+            # qu'une colonne `actif` dans l'index ne pourrait pas servir
+            models.Index(fields=['classe', 'nom', 'prenom'], condition=Q(actif=True), name='etudiant_actif_classe_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nom} {self.prenom} ({self.numero_etudiant})"
@@ -72,14 +95,20 @@ class Matiere(models.Model):
         verbose_name="Enseignant",
         
     )
-    compte = models.ForeignKey(Compte, on_delete=models.CASCADE)
+    compte = models.ForeignKey(Compte, on_delete=models.CASCADE, db_index=False)  # couvert par un index composite
     
     actif = models.BooleanField(default=True, verbose_name="Matière active")
+
+    objects = models.Manager()
+    du_compte = ManagerCompte()  # limité au compte de la requête en cours
     
     class Meta:
         verbose_name = "Matière"
         verbose_name_plural = "Matières"
         ordering = ['nom']
+        indexes = [
+            models.Index(fields=['compte', 'nom']),
+        ]
     
     def __str__(self):
         return f"{self.nom} ({self.code})"
@@ -94,9 +123,9 @@ class Note(models.Model):
         ('OR', 'Oral'),
     ]
     
-    etudiant = models.ForeignKey(Etudiant, on_delete=models.CASCADE, verbose_name="Étudiant")
-    matiere = models.ForeignKey(Matiere, on_delete=models.CASCADE, verbose_name="Matière")
-    compte = models.ForeignKey(Compte, on_delete=models.CASCADE)
+    etudiant = models.ForeignKey(Etudiant, on_delete=models.CASCADE, verbose_name="Étudiant", db_index=False)  # couvert par un index composite
+    matiere = models.ForeignKey(Matiere, on_delete=models.CASCADE, verbose_name="Matière", db_index=False)  # couvert par un index composite
+    compte = models.ForeignKey(Compte, on_delete=models.CASCADE, db_index=False)  # couvert par un index composite
     
     note = models.DecimalField(
         max_digits=4, 
@@ -126,16 +155,47 @@ class Note(models.Model):
         null=True,
         verbose_name="Modifié par"
     )
+    # Concurrence optimiste : une écriture n'est acceptée que si le client connaît la version courante.
+    # Compteur augmenté de 1 à chaque écriture (un horodatage dépasserait les entiers exacts de JSON)
+    version = models.BigIntegerField(default=1, editable=False, verbose_name="Version")
+
+    objects = models.Manager()
+    du_compte = ManagerCompte()  # limité au compte de la requête en cours
     
     class Meta:
         verbose_name = "Note"
         verbose_name_plural = "Notes"
         ordering = ['-date_evaluation']
         unique_together = ['etudiant', 'matiere', 'type_evaluation', 'date_evaluation']
+        indexes = [
+            # Notes d'une matière d'un compte (filtre de la liste des notes) ; couvre aussi
+            # les statistiques de classe, lues sans accéder aux lignes de la table
+            models.Index(fields=['compte', 'matiere', 'etudiant', 'semestre', 'note', 'note_sur']),
+            # Notes d'un étudiant pour un semestre (bulletins, grille)
+            models.Index(fields=['etudiant', 'semestre']),
+            # Dernières notes saisies (tableau de bord)
+            models.Index(fields=['compte', '-date_saisie']),
+            # Liste des notes dans l'ordre de pagination (date d'évaluation, id)
+            models.Index(fields=['compte', '-date_evaluation', '-id']),
+            # Notes d'une matière pour un semestre, quand la matière est le filtre le plus sélectif
+            models.Index(fields=['matiere', 'semestre']),
+        ]
     
     def __str__(self):
         return f"{self.etudiant.nom_complet} - {self.matiere.nom} : {self.note}/{self.note_sur}"
     
+    def save(self, *args, **kwargs):
+        if self._state.adding:
+            super().save(*args, **kwargs)
+            return
+        # Incrément fait par la base : juste même si cette instance a été lue avant une autre écriture
+        self.version = F('version') + 1
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'version'}
+        super().save(*args, **kwargs)
+        self.refresh_from_db(fields=['version'])
+    
     @property
     def note_sur_vingt(self):
         """Convertit la note sur 20"""
@@ -143,10 +203,10 @@ class Note(models.Model):
 
 class Bulletin(models.Model):
     """Modèle pour gérer les bulletins de notes"""
-    etudiant = models.ForeignKey(Etudiant, on_delete=models.CASCADE, verbose_name="Étudiant")
+    etudiant = models.ForeignKey(Etudiant, on_delete=models.CASCADE, verbose_name="Étudiant", db_index=False)  # couvert par un index composite
     semestre = models.CharField(max_length=2, verbose_name="Semestre")
     annee_scolaire = models.CharField(max_length=9, verbose_name="Année scolaire")
-    compte = models.ForeignKey(Compte, on_delete=models.CASCADE)
+    compte = models.ForeignKey(Compte, on_delete=models.CASCADE, db_index=False)  # couvert par un index composite
     
     moyenne_generale = models.DecimalField(
         max_digits=4, 
@@ -165,12 +225,106 @@ class Bulletin(models.Model):
         null=True,
         verbose_name="Généré par"
     )
+
+    objects = models.Manager()
+    du_compte = ManagerCompte()  # limité au compte de la requête en cours
     
     class Meta:
         verbose_name = "Bulletin"
         verbose_name_plural = "Bulletins"
         ordering = ['-date_generation']
         unique_together = ['etudiant', 'semestre', 'annee_scolaire']
+        indexes = [
+            # Bulletins d'une période pour un compte
+            models.Index(fields=['compte', 'semestre', 'annee_scolaire']),
+        ]
     
     def __str__(self):
         return f"Bulletin {self.etudiant.nom_complet} - {self.semestre} {self.annee_scolaire}"
+
+class BulletinJob(models.Model):
+    """Tâche de génération de bulletins exécutée en arrière-plan par le worker `traiter_bulletins`"""
+    STATUT_CHOICES = [
+        ('attente', 'En attente'),
+        ('en_cours', 'En cours'),
+        ('termine', 'Terminée'),
+        ('erreur', 'En erreur'),
+    ]
+    FORMAT_CHOICES = [
+        ('pdf', 'PDF individuel'),
+        ('pdf_groupe', 'PDF groupé'),
+        ('excel', 'Excel'),
+    ]
+    
+    compte = models.ForeignKey(Compte, on_delete=models.CASCADE)
+    classe = models.ForeignKey(
+        Classe,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        verbose_name="Classe",
+        help_text="Vide : toutes les classes du compte"
+    )
+    semestre = models.CharField(max_length=2, verbose_name="Semestre")
+    annee_scolaire = models.CharField(max_length=9, verbose_name="Année scolaire")
+    format_export = models.CharField(max_length=10, choices=FORMAT_CHOICES, verbose_name="Format d'export")
+    
+    statut = models.CharField(max_length=10, choices=STATUT_CHOICES, default='attente', verbose_name="Statut")
+    progression = models.PositiveIntegerField(default=0, verbose_name="Bulletins générés")
+    total = models.PositiveIntegerField(default=0, verbose_name="Bulletins à générer")
+    fichier = models.CharField(max_length=255, blank=True, verbose_name="Fichier généré")
+    nom_fichier = models.CharField(max_length=255, blank=True, verbose_name="Nom du fichier")
+    erreur = models.TextField(blank=True, verbose_name="Erreur")
+    
+    cree_par = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        verbose_name="Créée par"
+    )
+    date_creation = models.DateTimeField(auto_now_add=True, verbose_name="Date de création")
+    date_debut = models.DateTimeField(null=True, blank=True, verbose_name="Début du traitement")
+    date_fin = models.DateTimeField(null=True, blank=True, verbose_name="Fin du traitement")
+    date_activite = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Dernier signe de vie",
+        help_text="Mis à jour par le worker pendant le traitement"
+    )
+    tentatives = models.PositiveSmallIntegerField(default=0, verbose_name="Tentatives")
+    
+    class Meta:
+        verbose_name = "Tâche de génération de bulletins"
+        verbose_name_plural = "Tâches de génération de bulletins"
+        ordering = ['-date_creation']
+        indexes = [
+            # File d'attente : plus ancienne tâche en attente
+            models.Index(fields=['statut', 'date_creation']),
+        ]
+    
+    def __str__(self):
+        cible = self.classe.nom if self.classe_id else "Toutes les classes"
+        return f"Bulletins {cible} - {self.semestre} {self.annee_scolaire} ({self.get_statut_display()})"
+    
+    @property
+    def pourcentage(self):
+        """Avancement de la tâche en pourcentage"""
+        if self.statut == 'termine':
+            return 100
+        return int(self.progression * 100 / self.total) if self.total else 0
+
+class CompteStats(models.Model):
+    """Compteurs du tableau de bord d'un compte, tenus à jour à chaque écriture (voir compteurs.py)"""
+    compte = models.OneToOneField(Compte, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    nb_etudiants = models.PositiveIntegerField(default=0, verbose_name="Étudiants actifs")
+    nb_classes = models.PositiveIntegerField(default=0, verbose_name="Classes")
+    nb_matieres = models.PositiveIntegerField(default=0, verbose_name="Matières actives")
+    nb_notes = models.PositiveIntegerField(default=0, verbose_name="Notes")
+    date_maj = models.DateTimeField(auto_now=True, verbose_name="Dernière mise à jour")
+    
+    class Meta:
+        verbose_name = "Statistiques du compte"
+        verbose_name_plural = "Statistiques des comptes"
+    
+    def __str__(self):
+        return f"Statistiques {self.compte}"
@@ -0,0 +1,158 @@
+# pagination.py
+# Pagination par clé (keyset) : une page est lue à partir de la clé de tri de la
+# dernière ligne affichée (WHERE clé > curseur ... LIMIT n) au lieu d'un OFFSET,
+# donc la page N coûte autant que la page 1. Le total affiché est un comptage
+# mis en cache quelques minutes au lieu d'un COUNT(*) à chaque page.
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+# Durée de validité, en secondes, d'un total mis en cache
+DUREE_TOTAL = 300
+
+
+def _encoder(donnees):
+    texte = json.dumps(donnees, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texte.encode()).decode().rstrip('=')
+
+
+def _decoder(curseur):
+    try:
+        texte = base64.urlsafe_b64decode(curseur + '=' * (-len(curseur) % 4))
+        donnees = json.loads(texte)
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(donnees, dict) or donnees.get('d') not in ('suivant', 'precedent'):
+        return None
+    return donnees
+
+
+def total_en_cache(queryset):
+    """Nombre de lignes du QuerySet, recalculé au plus une fois toutes les DUREE_TOTAL secondes"""
+    cle = 'total:' + hashlib.sha1(str(queryset.query).encode()).hexdigest()
+    total = cache.get(cle)
+    if total is None:
+        total = queryset.order_by().count()
+        cache.set(cle, total, DUREE_TOTAL)
+    return total
+
+
+class PageCurseur:
+    """Une page de résultats et les curseurs opaques des pages voisines"""
+
+    def __init__(self, objets, precedent, suivant, total):
+        self.objets = objets
+        self.precedent = precedent
+        self.suivant = suivant
+        self.total = total
+
+    def __iter__(self):
+        return iter(self.objets)
+
+    def __len__(self):
+        return len(self.objets)
+
+    @property
+    def has_previous(self):
+        return self.precedent is not None
+
+    @property
+    def has_next(self):
+        return self.suivant is not None
+
+    @property
+    def has_other_pages(self):
+        return self.has_previous or self.has_next
+
+    @property
+    def derniere(self):
+        """Curseur de la dernière page (lue en sens inverse depuis la fin)"""
+        return _encoder({'d': 'precedent', 'v': None})
+
+
+class PaginateurCurseur:
+    """Pagine un QuerySet sur une clé de tri unique, par exemple ['-date_evaluation', '-id'].
+
+    Les champs de la clé ne doivent pas être NULL et le dernier doit être unique (l'id).
+    """
+
+    def __init__(self, queryset, ordre, par_page):
+        self.queryset = queryset
+        self.ordre = ordre
+        self.par_page = par_page
+        self.champs = [champ.lstrip('-') for champ in ordre]
+        self.modele_champs = [queryset.model._meta.get_field(champ) for champ in self.champs]
+
+    def _valeurs(self, objet):
+        return [self.modele_champs[i].value_to_string(objet) for i in range(len(self.champs))]
+
+    def _apres(self, valeurs, inverse):
+        """Condition « strictement après la clé `valeurs` » dans l'ordre de tri (ou l'ordre inverse)"""
+        valeurs = [champ.to_python(valeur) for champ, valeur in zip(self.modele_champs, valeurs)]
+        condition = Q()
+        egalites = {}
+        for champ, sens, valeur in zip(self.champs, self.ordre, valeurs):
+            croissant = not sens.startswith('-')
+            if inverse:
+                croissant = not croissant
+            condition |= Q(**egalites, **{f"{champ}__{'gt' if croissant else 'lt'}": valeur})
+            egalites[champ] = valeur
+        # Borne redondante sur le premier champ : permet à la base de partir directement
+        # du bon endroit dans l'index au lieu de le parcourir depuis le début
+        premier = self.champs[0]
+        croissant = not self.ordre[0].startswith('-')
+        if inverse:
+            croissant = not croissant
+        borne = Q(**{f"{premier}__{'gte' if croissant else 'lte'}": valeurs[0]})
+        return borne & condition
+
+    def page(self, curseur=None):
+        donnees = _decoder(curseur) if curseur else None
+        en_arriere = donnees is not None and donnees['d'] == 'precedent'
+        valeurs = donnees.get('v') if donnees else None
+        if valeurs is not None and (not isinstance(valeurs, list) or len(valeurs) != len(self.champs)):
+            valeurs = None
+            en_arriere = False
+
+        queryset = self.queryset
+        ordre = self.ordre
+        if en_arriere:
+            ordre = [champ[1:] if champ.startswith('-') else f'-{champ}' for champ in ordre]
+        if valeurs is not None:
+            try:
+                queryset = queryset.filter(self._apres(valeurs, en_arriere))
+            except (ValidationError, TypeError):
+                # Curseur modifié à la main : retour à la première page
+                return self.page()
+
+        # Une ligne de plus que la page pour savoir s'il en reste au-delà
+        objets = list(queryset.order_by(*ordre)[:self.par_page + 1])
+        encore = len(objets) > self.par_page
+        objets = objets[:self.par_page]
+        if en_arriere:
+            objets.reverse()
+            # Sans valeurs, la lecture part de la fin : c'est la dernière page
+            a_precedent, a_suivant = encore, valeurs is not None
+        else:
+            a_precedent, a_suivant = valeurs is not None, encore
+
+        precedent = suivant = None
+        if objets and a_precedent:
+            precedent = _encoder({'d': 'precedent', 'v': self._valeurs(objets[0])})
+        if objets and a_suivant:
+            suivant = _encoder({'d': 'suivant', 'v': self._valeurs(objets[-1])})
+
+        return PageCurseur(objets, precedent, suivant, total_en_cache(self.queryset))
+
+
+def filtres_sans_curseur(request):
+    """Paramètres GET de la page (filtres) sans le curseur, pour construire les liens de pagination"""
+    parametres = request.GET.copy()
+    parametres.pop('curseur', None)
+    parametres.pop('page', None)
+    return parametres.urlencode()
@@ -0,0 +1,191 @@
+# plans_requetes.py
+# Requêtes les plus fréquentes de l'application, construites comme dans les vues,
+# et contrôle de leur plan d'exécution SQLite (EXPLAIN QUERY PLAN) : chacune doit
+# passer par un index, jamais par un parcours complet de table.
+# Commande : python manage.py verifier_plans
+import re
+
+from datetime import date
+
+from django.db.models import Count, Q
+
+from utilisateurs.compte_actif import activer_compte
+from utilisateurs.models import Compte
+
+from .models import Bulletin, Classe, CompteStats, Etudiant, Matiere, Note
+from .pagination import PaginateurCurseur
+from .recherche import rechercher
+from .statistiques import _lignes
+
+
+REQUETES = {}
+
+# Identifiant fictif utilisé pour tous les filtres : seul le plan compte, pas le résultat
+ID = 0
+
+
+def requete_chaude(libelle):
+    """Enregistre une fonction renvoyant le QuerySet à contrôler"""
+    def enregistrer(fonction):
+        REQUETES[libelle] = fonction
+        return fonction
+    return enregistrer
+
+
+# ================= TABLEAU DE BORD =================
+
+@requete_chaude("Tableau de bord : compteurs du compte")
+def _compteurs():
+    return CompteStats.objects.filter(compte_id=ID)
+
+
+@requete_chaude("Tableau de bord : derniers étudiants inscrits")
+def _etudiants_recents():
+    return Etudiant.du_compte.filter(actif=True).order_by('-date_inscription')[:5]
+
+
+@requete_chaude("Tableau de bord : dernières notes saisies")
+def _notes_recentes():
+    return Note.du_compte.select_related('etudiant', 'matiere').order_by('-date_saisie')[:10]
+
+
+# ================= LISTES =================
+
+@requete_chaude("Liste des classes avec effectifs")
+def _liste_classes():
+    return Classe.du_compte.annotate(
+        nb_etudiants=Count('etudiant', filter=Q(etudiant__actif=True))
+    ).order_by('-annee_scolaire', 'niveau', 'nom')
+
+
+@requete_chaude("Liste des étudiants")
+def _liste_etudiants():
+    return Etudiant.du_compte.select_related('classe').order_by('nom', 'prenom', 'id')
+
+
+@requete_chaude("Recherche d'étudiants (index plein texte)")
+def _recherche_etudiants():
+    return rechercher(Etudiant.du_compte.select_related('classe'), 'dia', Compte(pk=ID)).order_by('nom', 'prenom', 'id')[:16]
+
+
+@requete_chaude("Liste des étudiants actifs")
+def _liste_etudiants_actifs():
+    return Etudiant.du_compte.select_related('classe').filter(actif=True).order_by('nom', 'prenom', 'id')
+
+
+@requete_chaude("Liste des étudiants d'une classe")
+def _liste_etudiants_classe():
+    return Etudiant.du_compte.select_related('classe').filter(classe_id=ID).order_by('nom', 'prenom', 'id')
+
+
+@requete_chaude("Liste des matières avec nombre de notes")
+def _liste_matieres():
+    return Matiere.du_compte.select_related('enseignant').annotate(nb_notes=Count('note')).order_by('nom')
+
+
+@requete_chaude("Liste des notes")
+def _liste_notes():
+    return Note.du_compte.select_related('etudiant', 'matiere', 'modifie_par').order_by('-date_evaluation', '-id')[:21]
+
+
+@requete_chaude("Liste des notes d'une matière")
+def _liste_notes_matiere():
+    return Note.du_compte.filter(matiere_id=ID).order_by('-date_evaluation', '-id')[:21]
+
+
+@requete_chaude("Liste des notes d'une classe")
+def _liste_notes_classe():
+    return Note.du_compte.filter(etudiant__classe_id=ID).order_by('-date_evaluation', '-id')[:21]
+
+
+@requete_chaude("Détail d'un étudiant : ses notes")
+def _notes_etudiant():
+    return Note.du_compte.filter(etudiant_id=ID).select_related('matiere').order_by('-date_evaluation')
+
+
+# ================= PAGINATION PAR CLÉ =================
+# Pages suivantes des listes : la condition du curseur doit démarrer dans l'index
+
+def _page_suivante(queryset, ordre, valeurs):
+    paginateur = PaginateurCurseur(queryset, ordre, 20)
+    return queryset.filter(paginateur._apres(valeurs, False)).order_by(*ordre)[:21]
+
+
+@requete_chaude("Liste des étudiants : page suivante")
+def _page_etudiants():
+    return _page_suivante(Etudiant.du_compte.select_related('classe'), ['nom', 'prenom', 'id'], ['Diallo', 'Awa', ID])
+
+
+@requete_chaude("Liste des étudiants actifs : page suivante")
+def _page_etudiants_actifs():
+    return _page_suivante(Etudiant.du_compte.filter(actif=True), ['nom', 'prenom', 'id'], ['Diallo', 'Awa', ID])
+
+
+@requete_chaude("Liste des notes : page suivante")
+def _page_notes():
+    return _page_suivante(
+        Note.du_compte.select_related('etudiant', 'matiere', 'modifie_par'),
+        ['-date_evaluation', '-id'], [date(2025, 1, 10), ID],
+    )
+
+
+@requete_chaude("Liste des notes d'une matière : page suivante")
+def _page_notes_matiere():
+    return _page_suivante(Note.du_compte.filter(matiere_id=ID), ['-date_evaluation', '-id'], [date(2025, 1, 10), ID])
+
+
+# ================= SAISIE ET BULLETINS =================
+
+@requete_chaude("Étudiants actifs d'une classe (saisie rapide, grille, bulletins)")
+def _etudiants_classe():
+    return Etudiant.objects.filter(classe_id=ID, actif=True).order_by('nom', 'prenom')
+
+
+@requete_chaude("Notes d'une classe pour un semestre (bulletins)")
+def _notes_classe_semestre():
+    return Note.objects.filter(
+        etudiant__classe_id=ID, etudiant__actif=True, semestre='S1'
+    ).order_by('matiere__nom', 'date_evaluation').values_list('id', 'matiere__nom', 'note')
+
+
+@requete_chaude("Notes d'une matière pour une classe et un semestre (grille)")
+def _notes_grille():
+    return Note.objects.filter(etudiant__classe_id=ID, etudiant__actif=True, matiere_id=ID, semestre='S1')
+
+
+@requete_chaude("Bulletins d'une période pour le compte")
+def _bulletins_periode():
+    return Bulletin.du_compte.filter(semestre='S1', annee_scolaire='2024-2025')
+
+
+@requete_chaude("Classes ayant des étudiants actifs (génération pour tout le compte)")
+def _classes_avec_etudiants():
+    return Classe.du_compte.filter(etudiant__actif=True).distinct().order_by('niveau', 'nom')
+
+
+@requete_chaude("Statistiques de classe du compte (notes regroupées par étudiant et matière)")
+def _statistiques_classes():
+    return _lignes(Compte(pk=ID))
+
+
+# ================= CONTRÔLE =================
+
+# `SCAN table` : parcours complet (avec ou sans index) ; les sous-requêtes et
+# lignes constantes ne sont pas des tables, et une table virtuelle lue par son
+# index (`VIRTUAL TABLE INDEX n:M...`, recherche FTS5) n'est pas parcourue
+_PARCOURS = re.compile(r'\bSCAN (?!CONSTANT ROW)(?!\()(\S+)(?!\S| VIRTUAL TABLE INDEX \d+:M)')
+
+
+def parcours_complets(plan):
+    """Tables parcourues entièrement d'après un plan EXPLAIN QUERY PLAN"""
+    return _PARCOURS.findall(plan)
+
+
+def verifier_plans():
+    """Plan de chaque requête enregistrée : liste de (libellé, plan, tables parcourues)"""
+    resultats = []
+    with activer_compte(Compte(pk=ID)):
+        for libelle, fonction in REQUETES.items():
+            plan = fonction().explain()
+            resultats.append((libelle, plan, parcours_complets(plan)))
+    return resultats
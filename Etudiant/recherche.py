@@ -0,0 +1,137 @@
+# recherche.py
+# Recherche d'étudiants par index plein texte SQLite FTS5 : les noms, prénoms et
+# numéros sont découpés en mots sans accents ni majuscules, et chaque mot saisi
+# est cherché comme début de mot (« dia » trouve « N'Diaye », « etu2024-0 » trouve
+# « ETU2024-001 »). L'index est tenu à jour par les signaux de Etudiant et, pour
+# les écritures groupées (import), par `indexer_etudiants`.
+# Commande de reconstruction : python manage.py reindexer_recherche
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Etudiant
+
+
+# Table virtuelle FTS5 créée par la migration 0008 (rowid = id de l'étudiant)
+TABLE = 'etudiant_recherche'
+
+# Nombre maximal de mots pris en compte dans une recherche
+MOTS_MAX = 8
+
+# Lettres et chiffres, comme le tokenizer unicode61 (tirets, apostrophes... séparent les mots)
+_MOT = re.compile(r'[^\W_]+')
+
+# Taille des lots lors de la reconstruction complète
+TAILLE_LOT = 5000
+
+
+def disponible():
+    """L'index FTS5 n'existe que sur SQLite ; ailleurs la recherche reste en LIKE"""
+    return connection.vendor == 'sqlite'
+
+
+def _mots(compte_id, texte):
+    """Mots du texte préfixés par le compte : « 12xdiallo ».
+
+    Une recherche par début de mot ne lit ainsi que les termes du compte, au lieu
+    de ceux de tous les comptes de la base. Le tokenizer retire accents et majuscules.
+    """
+    texte = unicodedata.normalize('NFC', texte or '')
+    return [f'{compte_id}x{mot}' for mot in _MOT.findall(texte)]
+
+
+def _ligne(pk, nom, prenom, numero_etudiant, compte_id):
+    return (
+        pk,
+        ' '.join(_mots(compte_id, nom)),
+        ' '.join(_mots(compte_id, prenom)),
+        ' '.join(_mots(compte_id, numero_etudiant)),
+    )
+
+
+def expression(texte, compte_id):
+    """Requête FTS5 pour le texte saisi, ou None s'il ne contient aucun mot.
+
+    Chaque mot saisi devient une phrase dont le dernier élément est un préfixe :
+    « jean-pi » cherche « jean » suivi d'un mot commençant par « pi ».
+    """
+    phrases = []
+    for mot in (texte or '').split()[:MOTS_MAX]:
+        elements = _mots(compte_id, mot)
+        if elements:
+            phrases.append(f'"{" ".join(elements)}"*')
+    return ' AND '.join(phrases) or None
+
+
+def rechercher(etudiants, texte, compte):
+    """Restreint le QuerySet `etudiants` à ceux qui correspondent au texte saisi"""
+    if not disponible():
+        return etudiants.filter(
+            Q(nom__icontains=texte) |
+            Q(prenom__icontains=texte) |
+            Q(numero_etudiant__icontains=texte)
+        )
+
+    requete = expression(texte, compte.pk)
+    if requete is None:
+        return etudiants
+    return etudiants.filter(
+        id__in=RawSQL(f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s', [requete])
+    )
+
+
+# ================= MISE À JOUR DE L'INDEX =================
+
+def _inserer(curseur, lignes):
+    curseur.executemany(
+        f'INSERT INTO {TABLE} (rowid, nom, prenom, numero_etudiant) VALUES (%s, %s, %s, %s)',
+        lignes,
+    )
+
+
+def indexer_etudiants(etudiants):
+    """Ajoute ou remplace les étudiants dans l'index (une requête par lot)"""
+    if not disponible():
+        return
+    lignes = [
+        _ligne(etudiant.pk, etudiant.nom, etudiant.prenom, etudiant.numero_etudiant, etudiant.compte_id)
+        for etudiant in etudiants
+    ]
+    if not lignes:
+        return
+    with connection.cursor() as curseur:
+        curseur.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(ligne[0],) for ligne in lignes])
+        _inserer(curseur, lignes)
+
+
+def desindexer_etudiants(ids):
+    """Retire de l'index les étudiants supprimés"""
+    if not disponible() or not ids:
+        return
+    with connection.cursor() as curseur:
+        curseur.executemany(f'DELETE FROM {TABLE} WHERE rowid = %s', [(pk,) for pk in ids])
+
+
+def reconstruire_index(modele=Etudiant):
+    """Vide et remplit l'index depuis la table des étudiants ; renvoie le nombre d'étudiants indexés.
+
+    `modele` permet à la migration de passer son modèle historique.
+    """
+    etudiants = modele.objects.order_by().values_list('id', 'nom', 'prenom', 'numero_etudiant', 'compte_id')
+    nombre = 0
+    lot = []
+    with connection.cursor() as curseur:
+        curseur.execute(f'DELETE FROM {TABLE}')
+        for etudiant in etudiants.iterator(chunk_size=TAILLE_LOT):
+            lot.append(_ligne(*etudiant))
+            if len(lot) == TAILLE_LOT:
+                _inserer(curseur, lot)
+                nombre += len(lot)
+                lot = []
+        _inserer(curseur, lot)
+        nombre += len(lot)
+        curseur.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+    return nombre
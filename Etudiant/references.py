@@ -0,0 +1,121 @@
+# references.py
+# Données de référence d'un compte (classes, matières, enseignants), relues sur
+# presque chaque page pour les listes déroulantes et les filtres. Elles sont mises
+# en cache par compte sous une clé qui contient un numéro de version : toute
+# écriture sur ces tables change la version du compte (voir signals.py), les
+# anciennes entrées ne sont plus jamais lues et expirent d'elles-mêmes.
+import time
+
+from django import forms
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from django.forms.models import ModelChoiceIterator
+
+from .models import Classe, Matiere
+
+
+# Durée de vie, en secondes, d'une liste en cache (la version la rend obsolète avant)
+DUREE = 24 * 3600
+
+
+def cache_references():
+    return caches[settings.REFERENCES_CACHE]
+
+
+def _cle_version(compte_id):
+    return f'references:{compte_id}:version'
+
+
+def invalider(compte_id):
+    """Rend obsolètes toutes les listes en cache du compte, une fois la transaction en cours validée.
+
+    Changer la version avant la validation laisserait une page lue entre-temps remettre
+    en cache l'ancienne liste sous la nouvelle version.
+    """
+    if compte_id is not None:
+        transaction.on_commit(lambda: cache_references().set(_cle_version(compte_id), time.time_ns(), None))
+
+
+def _liste(compte, nom, requete):
+    """Liste des objets de `requete` pour le compte, lue en cache si la version n'a pas changé"""
+    if compte is None:
+        return []
+    cache = cache_references()
+    version = cache.get_or_set(_cle_version(compte.pk), time.time_ns, None)
+    cle = f'references:{compte.pk}:{version}:{nom}'
+    objets = cache.get(cle)
+    if objets is None:
+        objets = list(requete)
+        cache.set(cle, objets, DUREE)
+    return objets
+
+
+def classes(compte):
+    return _liste(compte, 'classes', Classe.objects.filter(compte=compte))
+
+
+def matieres(compte, actives=False):
+    if actives:
+        return _liste(compte, 'matieres_actives', Matiere.objects.filter(compte=compte, actif=True))
+    return _liste(compte, 'matieres', Matiere.objects.filter(compte=compte))
+
+
+def enseignants(compte):
+    """Utilisateurs du compte (enseignants et administrateurs)"""
+    return _liste(compte, 'enseignants', User.objects.filter(profilutilisateur__compte=compte).order_by('username'))
+
+
+# ================= CHAMPS DE FORMULAIRE =================
+
+class IterateurEnCache(ModelChoiceIterator):
+    """Choix construits depuis la liste en cache du champ au lieu d'une requête"""
+
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for objet in self.field.objets:
+            yield self.choice(objet)
+
+    def __len__(self):
+        return len(self.field.objets) + (self.field.empty_label is not None)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.objets)
+
+
+class ChoixEnCache(forms.ModelChoiceField):
+    """ModelChoiceField dont les choix et la validation utilisent une liste en cache.
+
+    `charger(queryset, objets)` donne le QuerySet du compte (gardé pour les usages
+    de Django qui le lisent) et la liste en cache ; sans liste, le champ se comporte
+    comme un ModelChoiceField ordinaire.
+    """
+
+    objets = None
+
+    def charger(self, queryset, objets):
+        # La liste d'abord : affecter le QuerySet reconstruit les choix du widget
+        self.objets = objets
+        self.queryset = queryset
+
+    @property
+    def iterator(self):
+        return ModelChoiceIterator if self.objets is None else IterateurEnCache
+
+    def to_python(self, value):
+        if self.objets is None:
+            return super().to_python(value)
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            value = value.pk
+        for objet in self.objets:
+            if str(objet.pk) == str(value):
+                return objet
+        raise forms.ValidationError(
+            self.error_messages['invalid_choice'],
+            code='invalid_choice',
+            params={'value': value},
+        )
@@ -0,0 +1,130 @@
+# replique.py
+# Lectures des rapports (tableau de bord, liste des classes) envoyées sur une
+# réplique en lecture seule, pour ne pas concurrencer la saisie des notes sur la
+# base principale. La réplique est une copie de la base faite périodiquement par
+# `python manage.py copier_replique`.
+#
+# - Le code de rapport est marqué par `lecture_replique()` (décorateur ou bloc with),
+#   uniquement là où rien n'est écrit à partir de ce qui est lu : la génération des
+#   bulletins, qui enregistre moyennes et rangs, lit la base principale.
+# - Toutes les écritures vont sur 'default'. Après une écriture, les lectures de la
+#   même requête (ou de la même unité de travail, voir `portee_epinglage`) restent
+#   sur 'default' ; l'utilisateur qui vient d'écrire reste aussi sur 'default'
+#   pendant REPLIQUE_EPINGLAGE_DUREE secondes, pour relire ce qu'il a saisi.
+# - Les lectures faites dans une transaction de la base principale y restent.
+# - Tant que la réplique n'a jamais été copiée, tout reste sur 'default'.
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+CLE_SESSION = '_derniere_ecriture'
+
+_rapport = ContextVar('lecture_replique', default=False)
+_ecriture = ContextVar('ecriture_faite', default=False)
+_epinglee = ContextVar('lecture_epinglee', default=False)
+
+# Alias dont le fichier de réplique a déjà été trouvé (évite un stat à chaque requête)
+_pretes = set()
+
+
+def alias_replique():
+    alias = getattr(settings, 'REPLIQUE_LECTURE', None)
+    return alias if alias in settings.DATABASES else None
+
+
+def replique_prete(alias):
+    """La réplique existe : sur SQLite, son fichier a été rempli par copier_replique
+    (une simple connexion crée un fichier vide)"""
+    if alias in _pretes:
+        return True
+    connexion = connections[alias]
+    if connexion.vendor == 'sqlite':
+        nom = connexion.settings_dict['NAME']
+        if connexion.is_in_memory_db() or not os.path.exists(nom) or not os.path.getsize(nom):
+            return False
+    _pretes.add(alias)
+    return True
+
+
+@contextmanager
+def lecture_replique():
+    """Les lectures du bloc (ou de la fonction décorée) vont sur la réplique, sauf après une écriture"""
+    jeton = _rapport.set(True)
+    try:
+        yield
+    finally:
+        _rapport.reset(jeton)
+
+
+@contextmanager
+def portee_epinglage(epinglee=False):
+    """Nouvelle unité de travail (requête, tâche) sans écriture ; `epinglee` garde d'emblée ses lectures sur 'default'"""
+    jeton_ecriture = _ecriture.set(False)
+    jeton_epinglee = _epinglee.set(epinglee)
+    try:
+        yield
+    finally:
+        _ecriture.reset(jeton_ecriture)
+        _epinglee.reset(jeton_epinglee)
+
+
+def plus_recent_que_replique(instant):
+    """L'instant (timestamp) est peut-être postérieur à la dernière copie de la réplique"""
+    return instant is not None and time.time() - instant < settings.REPLIQUE_EPINGLAGE_DUREE
+
+
+def ecriture_faite():
+    """Une écriture a eu lieu dans la portée courante"""
+    return _ecriture.get()
+
+
+class RouteurReplique:
+    """Routeur de bases : écritures sur 'default', lectures de rapport sur la réplique"""
+
+    def db_for_read(self, model, **hints):
+        if not _rapport.get() or _ecriture.get() or _epinglee.get():
+            return DEFAULT_DB_ALIAS
+        alias = alias_replique()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block or not replique_prete(alias):
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _ecriture.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Même contenu des deux côtés : un objet lu sur la réplique peut être lié à un objet de 'default'
+        bases = {DEFAULT_DB_ALIAS, alias_replique()}
+        if obj1._state.db in bases and obj2._state.db in bases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplique reçoit le schéma avec la copie de la base
+        if db == alias_replique():
+            return False
+        return None
+
+
+class EpinglageMiddleware:
+    """Ouvre une portée d'épinglage par requête et retient en session la date de la dernière écriture ;
+    à placer après SessionMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        session = getattr(request, 'session', None)
+        derniere = session.get(CLE_SESSION) if session is not None else None
+        with portee_epinglage(plus_recent_que_replique(derniere)):
+            response = self.get_response(request)
+            if session is not None and ecriture_faite():
+                session[CLE_SESSION] = time.time()
+        return response
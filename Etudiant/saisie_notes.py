@@ -0,0 +1,119 @@
+# saisie_notes.py
+# Saisie rapide des notes d'une classe : toutes les valeurs postées sont vérifiées
+# avant toute écriture, puis enregistrées en une seule requête dans une transaction.
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import F
+
+from . import statistiques
+from .compteurs import ajuster
+from .models import Note
+
+
+# Note maximale acceptée par le modèle (validateur de Note.note)
+NOTE_MAX = Decimal('20')
+
+
+def valider_note(texte, note_sur):
+    """Convertit une note saisie (virgule acceptée) ; renvoie (valeur Decimal, None) ou (None, erreur)"""
+    try:
+        valeur = Decimal(str(texte).strip().replace(',', '.'))
+    except InvalidOperation:
+        return None, "Note numérique attendue"
+
+    if not valeur.is_finite() or valeur < 0:
+        return None, "La note doit être positive"
+    if valeur > note_sur:
+        return None, f"La note dépasse le barème ({note_sur})"
+    if valeur > NOTE_MAX:
+        return None, f"La note ne peut pas dépasser {NOTE_MAX}"
+    if valeur != valeur.quantize(Decimal('0.01')):
+        return None, "Deux décimales au maximum"
+    return valeur, None
+
+
+class LigneSaisie:
+    """Un étudiant de la classe, la valeur saisie pour lui et l'éventuelle erreur"""
+
+    def __init__(self, etudiant, valeur='', erreur=None):
+        self.etudiant = etudiant
+        self.valeur = valeur
+        self.erreur = erreur
+
+
+class SaisieNotes:
+    """Notes d'une même évaluation (matière, type, date) pour les étudiants d'une classe.
+
+    Les champs `note_<id étudiant>` vides sont ignorés. Si une valeur est invalide,
+    rien n'est enregistré et chaque ligne porte son erreur.
+    """
+
+    def __init__(self, etudiants, compte, user, matiere, type_evaluation, date_evaluation, semestre, note_sur):
+        self.compte = compte
+        self.user = user
+        self.matiere = matiere
+        self.type_evaluation = type_evaluation
+        self.date_evaluation = date_evaluation
+        self.semestre = semestre
+        self.note_sur = note_sur
+        self.lignes = [LigneSaisie(etudiant) for etudiant in etudiants]
+        self.notes = []
+
+    @property
+    def erreurs(self):
+        return [ligne for ligne in self.lignes if ligne.erreur]
+
+    @property
+    def valide(self):
+        return not self.erreurs
+
+    def lire(self, donnees):
+        """Lit et vérifie les valeurs postées ; renvoie True si toutes sont valides"""
+        self.notes = []
+        for ligne in self.lignes:
+            ligne.valeur = (donnees.get(f'note_{ligne.etudiant.id}') or '').strip()
+            if not ligne.valeur:
+                continue
+
+            valeur, ligne.erreur = valider_note(ligne.valeur, self.note_sur)
+            if ligne.erreur is None:
+                self.notes.append(Note(
+                    etudiant=ligne.etudiant,
+                    matiere=self.matiere,
+                    compte=self.compte,
+                    note=valeur,
+                    note_sur=self.note_sur,
+                    type_evaluation=self.type_evaluation,
+                    date_evaluation=self.date_evaluation,
+                    semestre=self.semestre,
+                    modifie_par=self.user,
+                ))
+        return self.valide
+
+    def enregistrer(self):
+        """Écrit toutes les notes en un INSERT ... ON CONFLICT DO UPDATE.
+
+        Une note déjà saisie pour le même étudiant, la même matière, le même type
+        et la même date (contrainte unique de Note) est remplacée.
+        """
+        if not self.valide:
+            raise ValueError("Des notes saisies sont invalides")
+        with transaction.atomic():
+            # Notes déjà saisies pour cette évaluation : leur version augmente (l'upsert
+            # ne peut pas l'incrémenter) et seules les autres notes sont des créations
+            existantes = Note.objects.filter(
+                etudiant__in=[note.etudiant_id for note in self.notes],
+                matiere=self.matiere,
+                type_evaluation=self.type_evaluation,
+                date_evaluation=self.date_evaluation,
+            ).update(version=F('version') + 1)
+            Note.objects.bulk_create(
+                self.notes,
+                update_conflicts=True,
+                unique_fields=['etudiant', 'matiere', 'type_evaluation', 'date_evaluation'],
+                update_fields=['note', 'note_sur', 'semestre', 'compte', 'modifie_par'],
+            )
+            ajuster(self.compte.pk, nb_notes=len(self.notes) - existantes)
+            statistiques.invalider(self.compte.pk)
+        return len(self.notes)
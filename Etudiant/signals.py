@@ -0,0 +1,114 @@
+# signals.py
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.contrib.auth.models import User
+
+from utilisateurs.models import ProfilUtilisateur
+
+from . import references, statistiques
+from .cache_pdf import cache_bulletins
+from .compteurs import ajuster
+from .models import Classe, Etudiant, Matiere, Note
+from .recherche import desindexer_etudiants, indexer_etudiants
+
+
+# ================= CACHE DES BULLETINS PDF =================
+
+@receiver([post_save, post_delete], sender=Note)
+def invalider_bulletins_etudiant(sender, instance, **kwargs):
+    """Une note modifiée ou supprimée rend obsolètes les PDF en cache de son étudiant"""
+    cache = cache_bulletins()
+    if cache is not None:
+        cache.invalider_etudiant(instance.compte_id, instance.etudiant_id)
+
+
+@receiver([post_save, post_delete], sender=Matiere)
+def invalider_bulletins_compte(sender, instance, **kwargs):
+    """Un coefficient ou un libellé de matière change les bulletins de tout le compte"""
+    cache = cache_bulletins()
+    if cache is not None:
+        cache.invalider_compte(instance.compte_id)
+
+
+# ================= INDEX DE RECHERCHE =================
+
+@receiver(post_save, sender=Etudiant)
+def indexer_etudiant(sender, instance, **kwargs):
+    indexer_etudiants([instance])
+
+
+@receiver(post_delete, sender=Etudiant)
+def desindexer_etudiant(sender, instance, **kwargs):
+    desindexer_etudiants([instance.pk])
+
+
+# ================= COMPTEURS DU TABLEAU DE BORD =================
+
+# Modèle -> compteur de CompteStats ; étudiants et matières ne comptent que s'ils sont actifs
+COMPTEURS = {Etudiant: 'nb_etudiants', Classe: 'nb_classes', Matiere: 'nb_matieres', Note: 'nb_notes'}
+
+
+def _compte(instance):
+    return 1 if getattr(instance, 'actif', True) else 0
+
+
+@receiver(pre_save, sender=Etudiant)
+@receiver(pre_save, sender=Matiere)
+def memoriser_actif(sender, instance, update_fields=None, **kwargs):
+    """Relit l'état actif enregistré pour savoir, après la sauvegarde, s'il a changé"""
+    if instance._state.adding or (update_fields is not None and 'actif' not in update_fields):
+        instance._actif_enregistre = None
+    else:
+        instance._actif_enregistre = sender.objects.filter(pk=instance.pk).values_list('actif', flat=True).first()
+
+
+@receiver(post_save, sender=Etudiant)
+@receiver(post_save, sender=Classe)
+@receiver(post_save, sender=Matiere)
+@receiver(post_save, sender=Note)
+def compter_enregistrement(sender, instance, created, **kwargs):
+    if created:
+        variation = _compte(instance)
+    elif getattr(instance, '_actif_enregistre', None) is None:
+        return
+    else:
+        variation = _compte(instance) - int(instance._actif_enregistre)
+    ajuster(instance.compte_id, **{COMPTEURS[sender]: variation})
+
+
+@receiver(post_delete, sender=Etudiant)
+@receiver(post_delete, sender=Classe)
+@receiver(post_delete, sender=Matiere)
+@receiver(post_delete, sender=Note)
+def compter_suppression(sender, instance, **kwargs):
+    ajuster(instance.compte_id, **{COMPTEURS[sender]: -_compte(instance)})
+
+
+# ================= DONNÉES DE RÉFÉRENCE EN CACHE =================
+
+@receiver([post_save, post_delete], sender=Classe)
+@receiver([post_save, post_delete], sender=Matiere)
+@receiver([post_save, post_delete], sender=ProfilUtilisateur)
+def invalider_references(sender, instance, **kwargs):
+    """Classes, matières et enseignants du compte sont relus à la prochaine page"""
+    references.invalider(instance.compte_id)
+
+
+@receiver(post_save, sender=User)
+def invalider_references_utilisateur(sender, instance, created, update_fields=None, **kwargs):
+    """Le nom d'un enseignant apparaît dans les listes de son compte (la connexion, qui
+    n'enregistre que last_login, ne change rien)"""
+    if created or (update_fields is not None and set(update_fields) <= {'last_login'}):
+        return
+    for compte_id in ProfilUtilisateur.objects.filter(user=instance).values_list('compte_id', flat=True):
+        references.invalider(compte_id)
+
+
+# ================= STATISTIQUES DE CLASSE =================
+
+@receiver([post_save, post_delete], sender=Note)
+@receiver([post_save, post_delete], sender=Etudiant)
+@receiver([post_save, post_delete], sender=Matiere)
+def invalider_statistiques(sender, instance, **kwargs):
+    """Notes, classe ou statut d'un étudiant, coefficient d'une matière : statistiques du compte à recalculer"""
+    statistiques.invalider(instance.compte_id)
@@ -0,0 +1,201 @@
+# statistiques.py
+# Statistiques de classe par semestre et par matière : moyenne, médiane, écart type,
+# quartiles, histogramme sur 20 et taux de réussite des moyennes des étudiants.
+# Une ligne « toutes matières » par classe et semestre reprend la moyenne générale
+# des bulletins (notes ramenées sur 20, pondérées par les coefficients).
+#
+# Les notes de tout le compte sont lues en une requête, regroupées par étudiant et
+# matière, puis toutes les classes sont calculées ensemble sur des tableaux NumPy.
+# Le résultat est mis en cache par compte sous une clé versionnée : toute écriture
+# de note, d'étudiant ou de matière du compte change la version (voir signals.py).
+import time
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, FloatField, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from . import references
+from .classement import SEUILS_MENTIONS, moyennes_ponderees, notes_sur_vingt
+from .models import Note
+
+
+# Moyenne (sur 20) à partir de laquelle un étudiant a réussi
+SEUIL_REUSSITE = SEUILS_MENTIONS[0]
+
+# Cases de l'histogramme : [0, 1[, [1, 2[, ... [19, 20]
+NB_CASES = 20
+
+# Durée de vie, en secondes, des statistiques en cache (la version les rend obsolètes avant)
+DUREE = 24 * 3600
+
+
+def cache_statistiques():
+    return caches[settings.STATISTIQUES_CACHE]
+
+
+def _cle_version(compte_id):
+    return f'statistiques:{compte_id}:version'
+
+
+def invalider(compte_id):
+    """Les statistiques du compte seront recalculées à la prochaine lecture suivant la
+    validation de la transaction en cours (avant, elles liraient encore les anciennes notes)"""
+    if compte_id is not None:
+        transaction.on_commit(lambda: cache_statistiques().set(_cle_version(compte_id), time.time_ns(), None))
+
+
+# ================= CALCUL =================
+
+def _lignes(compte):
+    """Une ligne par (classe, semestre, matière, étudiant) : somme des notes sur 20 et nombre de notes.
+
+    Le regroupement est fait par la base : NumPy ne reçoit qu'une ligne par
+    étudiant et par matière au lieu d'une par note.
+    """
+    # Une note sur 0 vaut NULL, ignoré par SUM mais compté : 0 point, comme dans les bulletins
+    sur_vingt = Cast('note', FloatField()) * 20.0 / NullIf(Cast('note_sur', FloatField()), 0.0)
+    return (
+        Note.objects.filter(compte=compte, etudiant__actif=True)
+        .values_list('etudiant__classe_id', 'semestre', 'matiere_id', 'etudiant_id')
+        .annotate(total=Coalesce(Sum(sur_vingt), 0.0, output_field=FloatField()), nombre=Count('id'))
+        .order_by()
+    )
+
+
+def _codes(valeurs):
+    """Valeurs distinctes et code (0..n-1) de chaque valeur"""
+    return np.unique(np.asarray(valeurs), return_inverse=True)
+
+
+def _distributions(groupes, valeurs, nb_groupes):
+    """Statistiques de chaque groupe ; `groupes` donne le groupe (0..nb_groupes-1) de chaque valeur"""
+    valeurs = np.round(valeurs, 2)
+    ordre = np.lexsort((valeurs, groupes))
+    groupes, valeurs = groupes[ordre], valeurs[ordre]
+
+    effectifs = np.bincount(groupes, minlength=nb_groupes)
+    debuts = np.cumsum(effectifs) - effectifs
+    moyennes = np.bincount(groupes, weights=valeurs, minlength=nb_groupes) / effectifs
+    ecarts = valeurs - moyennes[groupes]
+    ecarts_types = np.sqrt(np.bincount(groupes, weights=ecarts * ecarts, minlength=nb_groupes) / effectifs)
+
+    def quantile(p):
+        # Interpolation linéaire entre les deux valeurs encadrantes de chaque groupe (comme np.quantile)
+        position = debuts + p * (effectifs - 1)
+        bas = np.floor(position).astype(np.intp)
+        haut = np.ceil(position).astype(np.intp)
+        return valeurs[bas] + (valeurs[haut] - valeurs[bas]) * (position - bas)
+
+    cases = np.clip(valeurs.astype(np.intp), 0, NB_CASES - 1)
+    histogrammes = np.bincount(groupes * NB_CASES + cases, minlength=nb_groupes * NB_CASES).reshape(nb_groupes, NB_CASES)
+    reussites = np.bincount(groupes, weights=valeurs >= SEUIL_REUSSITE, minlength=nb_groupes)
+
+    return {
+        'effectif': effectifs,
+        'moyenne': moyennes,
+        'ecart_type': ecarts_types,
+        'minimum': valeurs[debuts],
+        'q1': quantile(0.25),
+        'mediane': quantile(0.5),
+        'q3': quantile(0.75),
+        'maximum': valeurs[debuts + effectifs - 1],
+        'taux_reussite': reussites * 100 / effectifs,
+        'histogramme': histogrammes,
+    }
+
+
+def _resultats(cles, nb_notes, stats):
+    resultats = []
+    for i, (classe_id, semestre, matiere_id) in enumerate(cles):
+        resultat = {
+            'classe_id': classe_id,
+            'semestre': semestre,
+            'matiere_id': matiere_id,
+            'effectif': int(stats['effectif'][i]),
+            'nb_notes': int(nb_notes[i]),
+            'histogramme': stats['histogramme'][i].tolist(),
+        }
+        for nom in ('moyenne', 'ecart_type', 'minimum', 'q1', 'mediane', 'q3', 'maximum', 'taux_reussite'):
+            resultat[nom] = round(float(stats[nom][i]), 2)
+        resultats.append(resultat)
+    return resultats
+
+
+def calculer(compte):
+    """Statistiques de toutes les classes du compte : une par (classe, semestre, matière),
+    plus une « toutes matières » (matiere_id None) par (classe, semestre)"""
+    lignes = list(_lignes(compte))
+    if not lignes:
+        return []
+    classes, semestres, matieres, etudiants, totaux, nombres = zip(*lignes)
+    ids_classes, classes = _codes(classes)
+    noms_semestres, semestres = _codes(semestres)
+    ids_matieres, matieres = _codes(matieres)
+    _, etudiants = _codes(etudiants)
+    nb_semestres, nb_matieres, nb_etudiants = len(noms_semestres), len(ids_matieres), etudiants.max() + 1
+    totaux = np.asarray(totaux, dtype=float)
+    nombres = np.asarray(nombres, dtype=float)
+    moyennes_matieres = totaux / nombres
+
+    # Coefficients depuis la liste des matières en cache (sans jointure ni Decimal dans la requête)
+    coefficients = {matiere.pk: float(matiere.coefficient) for matiere in references.matieres(compte)}
+    coefficients = np.array([coefficients.get(int(pk), 1.0) for pk in ids_matieres])[matieres]
+
+    # Chaque (classe, semestre) et (classe, semestre, matière) est codé par un seul entier
+    classes_semestres = classes * nb_semestres + semestres
+
+    # Moyennes des étudiants dans chaque matière
+    cles_matieres, groupes = _codes(classes_semestres * nb_matieres + matieres)
+    stats_matieres = _distributions(groupes, moyennes_matieres, len(cles_matieres))
+    notes_matieres = np.bincount(groupes, weights=nombres, minlength=len(cles_matieres))
+
+    # Moyenne générale de chaque étudiant par classe et semestre, pondérée comme les bulletins :
+    # chaque note compte pour le coefficient de sa matière
+    cles_etudiants, positions = _codes(classes_semestres * nb_etudiants + etudiants)
+    moyennes = moyennes_ponderees(positions, moyennes_matieres, coefficients * nombres, len(cles_etudiants))
+    cles_generales, groupes_generaux = _codes(cles_etudiants // nb_etudiants)
+    stats_generales = _distributions(groupes_generaux, moyennes, len(cles_generales))
+    notes_generales = np.bincount(groupes_generaux[positions], weights=nombres, minlength=len(cles_generales))
+
+    def classe_semestre(cle):
+        return int(ids_classes[cle // nb_semestres]), str(noms_semestres[cle % nb_semestres])
+
+    resultats = _resultats(
+        [(*classe_semestre(cle // nb_matieres), int(ids_matieres[cle % nb_matieres])) for cle in cles_matieres],
+        notes_matieres, stats_matieres,
+    ) + _resultats(
+        [(*classe_semestre(cle), None) for cle in cles_generales],
+        notes_generales, stats_generales,
+    )
+    # Par classe et semestre, la ligne « toutes matières » en premier
+    resultats.sort(key=lambda r: (r['classe_id'], r['semestre'], r['matiere_id'] is not None, r['matiere_id'] or 0))
+    return resultats
+
+
+def statistiques_compte(compte):
+    """Statistiques du compte, lues en cache tant qu'aucune donnée utilisée n'a changé"""
+    if compte is None:
+        return []
+    cache = cache_statistiques()
+    version = cache.get_or_set(_cle_version(compte.pk), time.time_ns, None)
+    cle = f'statistiques:{compte.pk}:{version}'
+    resultats = cache.get(cle)
+    if resultats is None:
+        resultats = calculer(compte)
+        cache.set(cle, resultats, DUREE)
+    return resultats
+
+
+def moyenne_generale(notes):
+    """Moyenne des notes (QuerySet) ramenées sur 20 et pondérées par les coefficients, ou None"""
+    lignes = list(notes.values_list('note', 'note_sur', 'matiere__coefficient'))
+    if not lignes:
+        return None
+    valeurs, notes_sur, coefficients = zip(*lignes)
+    moyenne = moyennes_ponderees(
+        np.zeros(len(lignes)), notes_sur_vingt(valeurs, notes_sur), np.asarray(coefficients, dtype=float), 1
+    )[0]
+    return None if np.isnan(moyenne) else round(float(moyenne), 2)
@@ -0,0 +1,209 @@
+# taches.py
+# File d'attente des générations de bulletins en arrière-plan.
+# La file est la table BulletinJob elle-même : pas de broker externe, les tâches
+# sont prises une à une par la commande `python manage.py traiter_bulletins`.
+# Le worker signale régulièrement qu'il est en vie ; une tâche restée en cours sans
+# signe de vie (worker arrêté ou tué) est remise en file par `entretenir`.
+import os
+import time
+import zipfile
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import BulletinJob, Classe, Etudiant
+
+
+def dossier_taches():
+    """Dossier où sont stockés les fichiers générés par les tâches"""
+    dossier = Path(settings.BULLETINS_TACHES_DIR)
+    dossier.mkdir(parents=True, exist_ok=True)
+    return dossier
+
+
+def creer_tache(compte, user, semestre, annee_scolaire, format_export, classe=None):
+    """Met en file une génération de bulletins pour une classe, ou pour tout le compte si `classe` est None"""
+    etudiants = Etudiant.objects.filter(compte=compte, actif=True)
+    if classe is not None:
+        etudiants = etudiants.filter(classe=classe)
+
+    return BulletinJob.objects.create(
+        compte=compte,
+        classe=classe,
+        semestre=semestre,
+        annee_scolaire=annee_scolaire,
+        format_export=format_export,
+        total=etudiants.count(),
+        cree_par=user,
+    )
+
+
+def prendre_tache_suivante():
+    """Réserve la plus ancienne tâche en attente, ou renvoie None si la file est vide.
+
+    La réservation est un UPDATE conditionnel sur le statut : si plusieurs workers
+    tournent, un seul obtient la tâche.
+    """
+    while True:
+        tache = BulletinJob.objects.filter(statut='attente').order_by('date_creation').first()
+        if tache is None:
+            return None
+        maintenant = timezone.now()
+        prise = BulletinJob.objects.filter(pk=tache.pk, statut='attente').update(
+            statut='en_cours',
+            date_debut=maintenant,
+            date_activite=maintenant,
+            tentatives=F('tentatives') + 1,
+        )
+        if prise:
+            tache.refresh_from_db()
+            return tache
+
+
+def _tentative(tache):
+    """La tâche, tant qu'elle n'a pas été reprise à ce worker (remise en file puis réservée à nouveau)"""
+    return BulletinJob.objects.filter(pk=tache.pk, statut='en_cours', tentatives=tache.tentatives)
+
+
+def reprendre_taches_abandonnees():
+    """Remet en file les tâches en cours sans signe de vie depuis BULLETINS_TACHES_DELAI_ABANDON,
+    ou les passe en erreur après BULLETINS_TACHES_TENTATIVES essais ; renvoie (reprises, échecs)"""
+    maintenant = timezone.now()
+    abandonnees = BulletinJob.objects.filter(
+        statut='en_cours',
+        date_activite__lt=maintenant - timedelta(seconds=settings.BULLETINS_TACHES_DELAI_ABANDON),
+    )
+    echecs = abandonnees.filter(tentatives__gte=settings.BULLETINS_TACHES_TENTATIVES).update(
+        statut='erreur',
+        erreur="Le traitement a été interrompu à chaque tentative.",
+        date_fin=maintenant,
+    )
+    reprises = abandonnees.update(
+        statut='attente',
+        progression=0,
+        date_debut=None,
+        date_activite=None,
+    )
+    return reprises, echecs
+
+
+def purger_fichiers():
+    """Supprime les fichiers générés depuis plus de BULLETINS_TACHES_RETENTION secondes
+    (y compris les fichiers partiels d'un worker interrompu) ; renvoie le nombre de fichiers supprimés"""
+    limite = timezone.now() - timedelta(seconds=settings.BULLETINS_TACHES_RETENTION)
+    supprimes = 0
+    for chemin in dossier_taches().glob('tache_*'):
+        if chemin.stat().st_mtime < limite.timestamp():
+            chemin.unlink(missing_ok=True)
+            supprimes += 1
+    BulletinJob.objects.filter(statut='termine', date_fin__lt=limite).exclude(fichier='').update(
+        fichier='',
+        erreur="Fichier supprimé après le délai de conservation.",
+    )
+    return supprimes
+
+
+def entretenir():
+    """Entretien de la file, fait périodiquement par le worker"""
+    reprises, echecs = reprendre_taches_abandonnees()
+    return reprises, echecs, purger_fichiers()
+
+
+class _Progression:
+    """Compteur de bulletins générés, écrit en base au plus une fois par intervalle avec le signe de vie du worker"""
+
+    def __init__(self, tache, intervalle=1.0):
+        self.tache = tache
+        self.intervalle = intervalle
+        self.en_attente = 0
+        self.derniere_ecriture = time.monotonic()
+
+    def __call__(self, nombre):
+        self.en_attente += nombre
+        if time.monotonic() - self.derniere_ecriture >= self.intervalle:
+            self.enregistrer()
+
+    def enregistrer(self):
+        _tentative(self.tache).update(
+            progression=F('progression') + self.en_attente,
+            date_activite=timezone.now(),
+        )
+        self.en_attente = 0
+        self.derniere_ecriture = time.monotonic()
+
+
+def _generateur(format_export):
+    from . import views
+
+    return {
+        'pdf': views.generer_bulletins_pdf_individuels,
+        'pdf_groupe': views.generer_bulletins_pdf_groupe,
+        'excel': views.generer_bulletins_excel,
+    }[format_export]
+
+
+def _nom_fichier(reponse):
+    """Nom du fichier annoncé dans l'en-tête Content-Disposition d'une réponse de génération"""
+    return reponse['Content-Disposition'].split('filename=', 1)[1].strip('"')
+
+
+def _ecrire_reponse(reponse, fichier):
+    """Copie le contenu (classique ou en flux) d'une réponse dans un fichier ouvert"""
+    try:
+        for morceau in reponse:
+            fichier.write(morceau)
+    finally:
+        reponse.close()
+
+
+def executer_tache(tache):
+    """Génère le fichier d'une tâche réservée et enregistre son résultat"""
+    progression = _Progression(tache)
+    generer = _generateur(tache.format_export)
+    chemin_temporaire = dossier_taches() / f"tache_{tache.pk}_{tache.tentatives}.part"
+
+    try:
+        if tache.classe_id:
+            reponse = generer(tache.classe, tache.semestre, tache.annee_scolaire, tache.cree_par, progression)
+            nom_fichier = _nom_fichier(reponse)
+            with open(chemin_temporaire, 'wb') as fichier:
+                _ecrire_reponse(reponse, fichier)
+        else:
+            # Toutes les classes du compte : un fichier par classe dans une archive ZIP
+            classes = Classe.objects.filter(
+                compte=tache.compte, etudiant__actif=True
+            ).distinct().order_by('niveau', 'nom')
+            nom_fichier = f"bulletins_{tache.compte.nom}_{tache.semestre}_{tache.annee_scolaire}.zip"
+            with zipfile.ZipFile(chemin_temporaire, 'w') as archive:
+                for classe in classes:
+                    reponse = generer(classe, tache.semestre, tache.annee_scolaire, tache.cree_par, progression)
+                    with archive.open(_nom_fichier(reponse), 'w', force_zip64=True) as entree:
+                        _ecrire_reponse(reponse, entree)
+                    progression.enregistrer()
+
+        nom_fichier = nom_fichier.replace(' ', '_').replace('/', '-')
+        chemin = dossier_taches() / f"tache_{tache.pk}_{tache.tentatives}_{nom_fichier}"
+        os.replace(chemin_temporaire, chemin)
+    except Exception as e:
+        chemin_temporaire.unlink(missing_ok=True)
+        _tentative(tache).update(
+            statut='erreur',
+            erreur=str(e),
+            date_fin=timezone.now(),
+        )
+        return False
+
+    termine = _tentative(tache).update(
+        statut='termine',
+        progression=F('total'),
+        fichier=str(chemin),
+        nom_fichier=nom_fichier,
+        date_fin=timezone.now(),
+    )
+    if not termine:
+        # Tâche reprise entre-temps par un autre worker : son fichier sera le bon
+        chemin.unlink(missing_ok=True)
+    return bool(termine)
@@ -1,3 +1,67 @@
-from django.test import TestCase
+import json
+from datetime import date
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from utilisateurs.models import Compte, ProfilUtilisateur
+
+from .models import Classe, Etudiant, Matiere, Note
+
+
+# Caches partagés remplacés par des caches en mémoire : les tests n'écrivent pas sur disque
+CACHES_TEST = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'partage': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'partage'},
+}
+
+
+@override_settings(CACHES=CACHES_TEST)
+class GrilleNotesTests(TestCase):
+    """PATCH de la grille de notes (views.grille_notes)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('admin_grille', password='x')
+        compte = Compte.objects.create(nom="Lycée test", admin=cls.user)
+        ProfilUtilisateur.objects.create(user=cls.user, compte=compte, role='admin')
+        cls.classe = Classe.objects.create(nom="T1", niveau="1ère année", annee_scolaire="2025-2026", compte=compte)
+        cls.matiere = Matiere.objects.create(nom="Maths", code="MAT1", coefficient=2, compte=compte)
+        cls.etudiant = Etudiant.objects.create(
+            numero_etudiant="E0001", nom="Diallo", prenom="Awa", date_naissance=date(2008, 1, 1),
+            sexe='F', classe=cls.classe, compte=compte,
+        )
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('grille_notes') + f'?classe={self.classe.pk}&matiere={self.matiere.pk}&semestre=S1'
+
+    def patch(self, cellules):
+        return self.client.patch(self.url, json.dumps({'cellules': cellules}), content_type='application/json')
+
+    def cellule(self, **valeurs):
+        return {'etudiant': self.etudiant.pk, 'evaluation': 'DS|2025-11-03', 'note': '12', 'version': None, **valeurs}
+
+    def test_bareme_non_fini_refuse(self):
+        for note_sur in ('NaN', 'sNaN', 'Infinity', '-Infinity'):
+            with self.subTest(note_sur=note_sur):
+                reponse = self.patch([self.cellule(note_sur=note_sur)])
+                self.assertEqual(reponse.status_code, 400)
+                self.assertEqual(reponse.json()['erreurs'], [{'index': 0, 'erreur': "Barème entre 0 et 100 attendu"}])
+        self.assertFalse(Note.objects.exists())
+
+    def test_creation_puis_modification_avec_version(self):
+        reponse = self.patch([self.cellule()])
+        self.assertEqual(reponse.status_code, 200)
+        version = reponse.json()['creees'][0]['version']
+        self.assertEqual(version, 1)
+
+        # Version renvoyée sous forme de chaîne : acceptée
+        reponse = self.patch([self.cellule(note='14', version=str(version))])
+        self.assertEqual(reponse.json()['modifiees'][0]['version'], 2)
+
+        # Ancienne version : conflit, la note n'est pas modifiée
+        reponse = self.patch([self.cellule(note='16', version=version)])
+        self.assertEqual(len(reponse.json()['conflits']), 1)
+        self.assertEqual(Note.objects.get().note, 14)
@@ -5,12 +5,14 @@ from . import views
 urlpatterns = [
     # Dashboard
     path('', views.dashboard, name='dashboard'),
+    path('stats/', views.stats_dashboard, name='stats_dashboard'),
     
     # ================= CLASSES =================
     path('classes/', views.liste_classes, name='liste_classes'),
     path('classes/ajouter/', views.ajouter_classe, name='ajouter_classe'),
     path('classes/<int:pk>/modifier/', views.modifier_classe, name='modifier_classe'),
     path('classes/<int:pk>/supprimer/', views.supprimer_classe, name='supprimer_classe'),
+    path('classes/statistiques/', views.statistiques_classes, name='statistiques_classes'),
     
     # ================= ÉTUDIANTS =================
     path('etudiants/', views.liste_etudiants, name='liste_etudiants'),
@@ -31,11 +33,14 @@ urlpatterns = [
     path('notes/<int:pk>/modifier/', views.modifier_note, name='modifier_note'),
     path('notes/<int:pk>/supprimer/', views.supprimer_note, name='supprimer_note'),
     path('notes/saisie-rapide/', views.saisie_rapide_notes, name='saisie_rapide_notes'),
+    path('notes/grille/', views.grille_notes, name='grille_notes'),
     path('notes/<int:pk>/supprimer/', views.supprimer_note, name='supprimer_note'),
     
     # ================= IMPORT/EXPORT =================
     path('import/', views.importer_donnees, name='importer_donnees'),
     path('bulletins/', views.generation_bulletins, name='generation_bulletins'),
+    path('bulletins/taches/<int:pk>/', views.etat_tache_bulletins, name='etat_tache_bulletins'),
+    path('bulletins/taches/<int:pk>/telecharger/', views.telecharger_tache_bulletins, name='telecharger_tache_bulletins'),
     
     # ================= AJAX =================
     path('ajax/etudiants-classe/', views.get_etudiants_classe, name='get_etudiants_classe'),
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,9 +45,11 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
+    'Etudiant.replique.EpinglageMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'utilisateurs.middleware.CompteMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -74,13 +77,62 @@ WSGI_APPLICATION = 'Gestionnaire_etudiant.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Profil SQLite de production :
+# - BEGIN IMMEDIATE : une transaction prend le verrou d'écriture dès son début et
+#   attend (busy_timeout) qu'il se libère, au lieu d'échouer en « database is locked »
+#   quand elle passe de la lecture à l'écriture pendant qu'un autre écrit ;
+# - connexions gardées entre les requêtes (CONN_MAX_AGE) ;
+# - PRAGMAS appliqués à chaque nouvelle connexion (Etudiant/connexion_sqlite.py) :
+#   journal WAL (les lectures ne bloquent plus l'écriture et inversement),
+#   synchronous NORMAL (sûr en WAL, un fsync par checkpoint au lieu d'un par
+#   transaction), attente de verrou, cache de pages et lecture par mmap.
+#   Le mode de journal est écrit dans le fichier de la base et y reste : WAL (et
+#   synchronous NORMAL, qui va avec) n'est appliqué qu'hors DEBUG, pour qu'une
+#   commande lancée sur la base de développement versionnée ne la modifie pas.
+SQLITE_PRAGMAS_PRODUCTION = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 10000,          # millisecondes
+    'cache_size': -64000,           # négatif : en Kio (64 Mio)
+    'mmap_size': 256 * 1024 * 1024,  # octets
+    'temp_store': 'MEMORY',
+}
+SQLITE_PRAGMAS_PERSISTANTS = ('journal_mode', 'synchronous')
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+        'PRAGMAS': SQLITE_PRAGMAS_PRODUCTION if not DEBUG else {
+            nom: valeur for nom, valeur in SQLITE_PRAGMAS_PRODUCTION.items()
+            if nom not in SQLITE_PRAGMAS_PERSISTANTS
+        },
+    },
+    # Réplique en lecture seule des rapports (Etudiant/replique.py), copiée depuis
+    # 'default' par `python manage.py copier_replique --intervalle 240`
+    'replique': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replique.sqlite3',
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
+        'PRAGMAS': {
+            'query_only': 'ON',
+            'busy_timeout': 10000,
+            'cache_size': -64000,
+            'mmap_size': 256 * 1024 * 1024,
+            'temp_store': 'MEMORY',
+        },
+        'TEST': {'MIRROR': 'default'},
+    },
 }
 
+DATABASE_ROUTERS = ['Etudiant.replique.RouteurReplique']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -122,3 +174,71 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Bulletins
+# Nombre de processus utilisés pour le rendu des bulletins PDF individuels
+# (0 ou 1 : rendu séquentiel dans le processus de la requête)
+BULLETINS_PDF_PROCESSUS = os.cpu_count() or 1
+
+# Dossier des fichiers produits par les tâches de génération en arrière-plan
+# (commande `python manage.py traiter_bulletins`)
+BULLETINS_TACHES_DIR = BASE_DIR / 'media' / 'bulletins'
+
+# Tâche en cours sans signe de vie du worker depuis ce délai (secondes) : worker
+# arrêté ou tué, la tâche est remise en file (ou passée en erreur après le nombre
+# de tentatives)
+BULLETINS_TACHES_DELAI_ABANDON = 15 * 60
+BULLETINS_TACHES_TENTATIVES = 3
+
+# Conservation (secondes) des fichiers générés par les tâches, supprimés ensuite par le worker
+BULLETINS_TACHES_RETENTION = 7 * 24 * 3600
+
+# Cache disque des bulletins PDF individuels déjà rendus (None pour le désactiver)
+BULLETINS_CACHE_DIR = BASE_DIR / 'media' / 'cache_bulletins'
+BULLETINS_CACHE_TAILLE_MAX = 500 * 1024 * 1024  # octets, éviction LRU au-delà
+
+
+# Import de données
+# Taille maximale des fichiers importés : ils sont lus et insérés par lots,
+# la mémoire utilisée ne dépend pas de leur taille
+IMPORT_TAILLE_MAX = 200 * 1024 * 1024  # octets
+
+
+# Profil et compte de l'utilisateur connecté (utilisateurs.middleware.CompteMiddleware)
+# Durée maximale, en secondes, pendant laquelle la copie en session est utilisée
+# sans relire la base (filet de sécurité si une version de profil sort du cache).
+PROFIL_SESSION_DUREE = 300
+
+
+# Caches
+# `default` : mémoire propre à chaque processus.
+# `partage` : sur disque, pour que tous les processus du serveur voient la même version
+# après une modification ; une instance Redis/Memcached partagée peut le remplacer.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'partage': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'media' / 'cache_partage',
+        'TIMEOUT': 24 * 3600,
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+# Versions des profils en session (utilisateurs/middleware.py) : le retrait d'un accès
+# doit être vu par tous les processus
+PROFIL_CACHE = 'partage'
+# Classes, matières et enseignants de chaque compte (Etudiant/references.py)
+REFERENCES_CACHE = 'partage'
+# Statistiques de classe (Etudiant/statistiques.py)
+STATISTIQUES_CACHE = 'partage'
+
+
+# Réplique de lecture (Etudiant/replique.py)
+# Alias des lectures de rapport (None : tout sur 'default').
+REPLIQUE_LECTURE = 'replique'
+# Après une écriture, les lectures de l'utilisateur restent sur 'default' pendant
+# cette durée en secondes : plus que l'intervalle entre deux copies de la réplique
+# augmenté de la durée d'une copie.
+REPLIQUE_EPINGLAGE_DUREE = 300
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class UtilisateursConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'utilisateurs'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,42 @@
+# compte_actif.py
+# Compte de la requête en cours (positionné par CompteMiddleware), utilisé par les
+# managers `du_compte` des modèles pour limiter chaque requête SQL à ce compte.
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models
+
+
+_compte_actif = ContextVar('compte_actif', default=None)
+
+
+class AucunCompteActif(RuntimeError):
+    """Manager `du_compte` utilisé sans compte actif (hors requête, utilisateur sans profil)"""
+
+
+def compte_actif():
+    compte = _compte_actif.get()
+    if compte is None:
+        raise AucunCompteActif("Aucun compte actif : utiliser activer_compte() en dehors des vues")
+    return compte
+
+
+@contextmanager
+def activer_compte(compte):
+    """Rend `compte` actif le temps du bloc (vues, commandes, worker)"""
+    jeton = _compte_actif.set(compte)
+    try:
+        yield compte
+    finally:
+        _compte_actif.reset(jeton)
+
+
+class ManagerCompte(models.Manager):
+    """Manager limité aux lignes du compte actif.
+
+    Sans compte actif, il lève AucunCompteActif plutôt que de renvoyer les lignes
+    de tous les comptes.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(compte=compte_actif())
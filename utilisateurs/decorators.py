@@ -0,0 +1,14 @@
+# decorators.py
+from functools import wraps
+
+from django.http import HttpResponseForbidden
+
+
+def profil_requis(vue):
+    """Refuse l'accès aux utilisateurs sans profil ; à placer sous @login_required"""
+    @wraps(vue)
+    def verifier(request, *args, **kwargs):
+        if request.profil is None:
+            return HttpResponseForbidden("Aucun profil utilisateur associé. Contacte l'administrateur.")
+        return vue(request, *args, **kwargs)
+    return verifier
@@ -0,0 +1,99 @@
+# middleware.py
+# Profil et compte de l'utilisateur connecté, résolus une fois par requête et
+# exposés en `request.profil` / `request.compte` (None si pas de profil).
+# Le compte est aussi rendu actif pour les managers `du_compte` (compte_actif.py).
+# Ils sont mémorisés dans la session : la base n'est relue que si le profil a été
+# invalidé (voir signals.py) ou si la copie en session a plus de PROFIL_SESSION_DUREE secondes.
+# Les versions de profil sont dans un cache partagé par tous les processus (PROFIL_CACHE) :
+# un profil supprimé ou changé de compte est relu par chacun dès la requête suivante.
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .compte_actif import activer_compte
+from .models import Compte, ProfilUtilisateur
+
+
+CLE_SESSION = '_profil_utilisateur'
+
+
+def _cle_version(user_id):
+    return f'profil_version:{user_id}'
+
+
+def cache_profils():
+    return caches[settings.PROFIL_CACHE]
+
+
+def version_profil(user_id):
+    return cache_profils().get(_cle_version(user_id), 0)
+
+
+def invalider_profil(user_id):
+    """Force la relecture du profil de cet utilisateur à sa prochaine requête.
+
+    Fait après la validation de la transaction en cours : une requête lancée entre-temps
+    relirait l'ancien profil et le garderait en session sous la nouvelle version.
+    """
+    transaction.on_commit(lambda: cache_profils().set(_cle_version(user_id), time.time_ns(), None))
+
+
+def _lire_base(user):
+    """Profil et compte en une requête, sous forme sérialisable pour la session"""
+    profil = ProfilUtilisateur.objects.select_related('compte').filter(user=user).first()
+    donnees = {'user_id': user.pk, 'version': version_profil(user.pk), 'lu_le': time.time(), 'profil': None}
+    if profil is not None:
+        donnees['profil'] = {
+            'id': profil.id,
+            'role': profil.role,
+            'compte_id': profil.compte.id,
+            'compte_nom': profil.compte.nom,
+            'compte_admin_id': profil.compte.admin_id,
+        }
+    return donnees
+
+
+def _a_jour(donnees, user):
+    return (
+        donnees is not None
+        and donnees['user_id'] == user.pk
+        and donnees['version'] == version_profil(user.pk)
+        and time.time() - donnees['lu_le'] < settings.PROFIL_SESSION_DUREE
+    )
+
+
+def _construire(donnees, user):
+    """Instances ProfilUtilisateur / Compte reconstruites sans requête"""
+    if donnees['profil'] is None:
+        return None, None
+    p = donnees['profil']
+    compte = Compte.from_db('default', ['id', 'nom', 'admin_id'], [p['compte_id'], p['compte_nom'], p['compte_admin_id']])
+    profil = ProfilUtilisateur.from_db(
+        'default', ['id', 'user_id', 'compte_id', 'role'], [p['id'], user.pk, p['compte_id'], p['role']]
+    )
+    profil.compte = compte
+    profil.user = user
+    return profil, compte
+
+
+class CompteMiddleware:
+    """Renseigne `request.profil` et `request.compte` et active le compte ;
+    à placer après AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.profil = request.compte = None
+        user = request.user
+        if user.is_authenticated:
+            donnees = request.session.get(CLE_SESSION)
+            if not _a_jour(donnees, user):
+                donnees = _lire_base(user)
+                request.session[CLE_SESSION] = donnees
+            request.profil, request.compte = _construire(donnees, user)
+        with activer_compte(request.compte):
+            return self.get_response(request)
@@ -0,0 +1,23 @@
+# signals.py
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .middleware import invalider_profil
+from .models import Compte, ProfilUtilisateur
+
+
+# ================= PROFIL EN SESSION =================
+
+@receiver([post_save, post_delete], sender=ProfilUtilisateur)
+def invalider_profil_utilisateur(sender, instance, **kwargs):
+    """Un profil créé, modifié ou supprimé est relu à la prochaine requête de son utilisateur"""
+    invalider_profil(instance.user_id)
+
+
+@receiver(post_save, sender=Compte)
+def invalider_profils_compte(sender, instance, created, **kwargs):
+    """Le nom du compte est copié dans la session de chacun de ses utilisateurs"""
+    if created:
+        return
+    for user_id in ProfilUtilisateur.objects.filter(compte=instance).values_list('user_id', flat=True):
+        invalider_profil(user_id)
@@ -28,9 +28,8 @@ def creer_compte(request):
 
 @login_required
 def ajouter_enseignant(request):
-    try:
-        profil_admin = ProfilUtilisateur.objects.get(user=request.user, role='admin')
-    except ProfilUtilisateur.DoesNotExist:
+    profil_admin = request.profil
+    if profil_admin is None or profil_admin.role != 'admin':
         return HttpResponse("Vous n'avez pas le droit d'ajouter un enseignant.", status=403)
 
     if request.method == 'POST':